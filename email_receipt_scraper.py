@@ -7,30 +7,179 @@ to scrape receipts from email accounts and store the data in a Google spreadshee
 """
 
 import os
+import re
+import copy
 import sys
 import json
+import hashlib
 import argparse
+import asyncio
 import logging
+import logging.handlers
+import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 
+# Async HTTP imports
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Shared HTTP transport imports
+try:
+    import httplib2
+    HTTPLIB2_AVAILABLE = True
+except ImportError:
+    HTTPLIB2_AVAILABLE = False
+
+# Fast JSON imports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Vectorized filtering imports
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # Import custom modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from src.email_auth import create_authenticator, EmailAuthenticator
-from src.receipt_parser import ReceiptParserFactory
+from src.email_auth import (create_authenticator, EmailAuthenticator, GmailAPIAuthenticator,
+                            MAX_GMAIL_BATCH_SIZE)
+from src.receipt_parser import ReceiptParserFactory, PARSER_VERSION, parse_in_worker
+from src.parser_cache import ParserCache
 from src.sheets_integration import GoogleSheetsIntegration
 
-# Set up logging
+# Set up logging; file writes are buffered and flushed in blocks (or
+# immediately on errors)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_log_file_handler = logging.FileHandler("email_receipt_scraper.log")
+_log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler("email_receipt_scraper.log"),
+        logging.handlers.MemoryHandler(capacity=1024, target=_log_file_handler),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("email_receipt_scraper")
 
+# Number of concurrent batch fetchers in the async pipeline
+ASYNC_FETCH_WORKERS = 4
+
+# Default configuration; copied for each scraper, never modified
+_DEFAULT_CONFIG = {
+    "email": {
+        "auth_type": "gmail_api",
+        "credentials_file": "credentials.json",
+        "token_file": "token.json",
+        "email_address": None,
+        "password": None,
+        "imap_server": None,
+        "imap_port": 993,
+        "search_query": 'subject:receipt OR subject:"order confirmation"',
+        "trusted_senders": [
+            "auto-confirm@amazon.com",
+            "noreply@amazon.com",
+            "receipts@stripe.com"
+        ],
+        "since": "90d",
+        "max_emails": 100,
+        "gmail_fields": None
+    },
+    "sheets": {
+        "credentials_file": "credentials.json",
+        "token_file": "sheets_token.json",
+        "spreadsheet_id": None,
+        "spreadsheet_title": "Receipt Tracker"
+    },
+    "output": {
+        "save_receipts": True,
+        "receipts_dir": "receipts",
+        "per_file": False,
+        "parser_cache": True
+    }
+}
+
+# Receipts below this parser confidence are discarded
+MIN_CONFIDENCE = 0.3
+
+# Number of receipts buffered before they are written to the spreadsheet
+SHEETS_FLUSH_SIZE = 50
+
+# Attempts per spreadsheet write before giving up until the next flush
+SHEETS_FLUSH_RETRIES = 3
+
+# Threads shared by all I/O-bound work (batch fetches, Sheets writes, saves)
+IO_POOL_WORKERS = 16
+
+def _json_default(obj: Any) -> str:
+    """Serialize values that JSON has no type for"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+def _dump_json(data: Any, indent: bool = True) -> bytes:
+    """Serialize data as JSON (indented or compact), using orjson when available"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_json_default, option=option)
+    
+    if indent:
+        return json.dumps(data, indent=2, default=_json_default).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+def _load_json(raw: bytes) -> Any:
+    """Deserialize JSON, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+# Characters that are not safe in receipt file names
+_SLUG_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+@functools.lru_cache(maxsize=1024)
+def _slug(value: str) -> str:
+    """Make a string safe to use in a file name"""
+    return _SLUG_RE.sub('_', value)[:64]
+
+def _confident_mask(batch: List[Optional[Dict]]) -> List[bool]:
+    """
+    Flag the parsed receipts in a batch that meet MIN_CONFIDENCE
+    
+    Failed parses (None) are never flagged. The comparison is vectorized
+    with NumPy when it is available.
+    """
+    if NUMPY_AVAILABLE:
+        confidences = np.fromiter(
+            (-1.0 if receipt_data is None else receipt_data.get('confidence', 0.0)
+             for receipt_data in batch),
+            dtype=np.float64, count=len(batch))
+        return (confidences >= MIN_CONFIDENCE).tolist()
+    
+    return [receipt_data is not None and receipt_data.get('confidence', 0.0) >= MIN_CONFIDENCE
+            for receipt_data in batch]
+
+def _deep_merge(base: Dict, overlay: Dict) -> None:
+    """Recursively merge overlay into base in place"""
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _deep_merge(base[key], value)
+        else:
+            base[key] = value
+
 class EmailReceiptScraper:
     """Main class for email receipt scraping application"""
     
@@ -45,44 +194,37 @@ class EmailReceiptScraper:
         self.email_auth = None
         self.receipt_parser = ReceiptParserFactory.create_parser()
         self.sheets_integration = None
+        self._receipt_fp = None
+        self._pending = []
+        
+        # One thread pool for all I/O fan-out, so threads are reused rather
+        # than spawned per task; created on first use and shut down at the
+        # end of each run
+        self._io_pool = None
+        self._io_futures = []
+        self._flush_lock = threading.Lock()
+        self._flush_future = None
+        self._sheets_ready = False
+        
+        # Set when Sheets setup fails, so the rest of the run does not try
+        # again (and restart the login flow) on every flush
+        self._sheets_failed = False
+        
+        # One keep-alive connection pool for both Gmail and Sheets API calls,
+        # so repeated calls skip the TCP and TLS handshakes
+        self._http = httplib2.Http(timeout=60) if HTTPLIB2_AVAILABLE else None
     
     def _load_config(self, config_file: str) -> Dict:
         """Load configuration from file or use defaults"""
-        default_config = {
-            "email": {
-                "auth_type": "gmail_api",
-                "credentials_file": "credentials.json",
-                "token_file": "token.json",
-                "email_address": None,
-                "password": None,
-                "imap_server": None,
-                "imap_port": 993,
-                "search_query": "subject:receipt OR subject:order confirmation",
-                "max_emails": 100
-            },
-            "sheets": {
-                "credentials_file": "credentials.json",
-                "token_file": "sheets_token.json",
-                "spreadsheet_id": None,
-                "spreadsheet_title": "Receipt Tracker"
-            },
-            "output": {
-                "save_receipts": True,
-                "receipts_dir": "receipts"
-            }
-        }
+        default_config = copy.deepcopy(_DEFAULT_CONFIG)
         
         if config_file and os.path.exists(config_file):
             try:
-                with open(config_file, 'r') as f:
-                    user_config = json.load(f)
+                with open(config_file, 'rb') as f:
+                    user_config = _load_json(f.read())
                 
                 # Merge user config with defaults
-                for section in default_config:
-                    if section in user_config:
-                        for key in default_config[section]:
-                            if key in user_config[section]:
-                                default_config[section][key] = user_config[section][key]
+                _deep_merge(default_config, user_config)
             except Exception as e:
                 logger.error(f"Error loading config file: {str(e)}")
         
@@ -91,8 +233,8 @@ class EmailReceiptScraper:
     def save_config(self, config_file: str) -> bool:
         """Save current configuration to file"""
         try:
-            with open(config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            with open(config_file, 'wb') as f:
+                f.write(_dump_json(self.config))
             return True
         except Exception as e:
             logger.error(f"Error saving config file: {str(e)}")
@@ -107,7 +249,8 @@ class EmailReceiptScraper:
             self.email_auth = create_authenticator(
                 "gmail_api",
                 credentials_file=email_config["credentials_file"],
-                token_file=email_config["token_file"]
+                token_file=email_config["token_file"],
+                http=self._http
             )
         elif auth_type == "imap":
             self.email_auth = create_authenticator(
@@ -129,7 +272,8 @@ class EmailReceiptScraper:
         
         self.sheets_integration = GoogleSheetsIntegration(
             credentials_file=sheets_config["credentials_file"],
-            token_file=sheets_config["token_file"]
+            token_file=sheets_config["token_file"],
+            http=self._http
         )
         
         if not self.sheets_integration.authenticate():
@@ -150,76 +294,474 @@ class EmailReceiptScraper:
         
         return True
     
-    def fetch_and_process_emails(self) -> List[Dict]:
-        """Fetch emails and process them for receipt data"""
+    def fetch_and_process_emails(self, stream_to_sheets: bool = False) -> List[Dict]:
+        """
+        Fetch emails and process them for receipt data
+        
+        Args:
+            stream_to_sheets: Write receipts to the spreadsheet in batches as
+                they are found instead of returning them all at the end
+        
+        Returns:
+            List[Dict]: Receipts found; when streaming, only the receipts that
+                could not be written to the spreadsheet
+        """
         if not self.email_auth or not self.email_auth.is_authenticated():
             logger.error("Email authentication not set up")
             return []
         
         email_config = self.config["email"]
-        query = email_config["search_query"]
+        query = self._build_query()
         max_emails = email_config["max_emails"]
         
         logger.info(f"Fetching emails with query: {query}")
-        emails = self.email_auth.fetch_emails(query=query, max_emails=max_emails)
-        logger.info(f"Found {len(emails)} emails matching query")
+        self._make_receipts_dir()
+        parser_cache = self._open_parser_cache()
         
-        receipts = []
+        try:
+            if isinstance(self.email_auth, GmailAPIAuthenticator):
+                # List matching IDs first; Gmail messages never change, so only
+                # the ones without a cached parse need to be downloaded
+                message_ids = self.email_auth.list_message_ids(query=query, max_emails=max_emails)
+                parsed = parser_cache.get_many(message_ids) if parser_cache else {}
+                emails = self.email_auth.fetch_emails_bulk(
+                    [message_id for message_id in message_ids if message_id not in parsed],
+                    fields=email_config["gmail_fields"],
+                    format=self._get_gmail_format(),
+                    executor=self._get_io_pool()
+                )
+                keys = message_ids
+                email_keys = [email_data['id'] for email_data in emails]
+            else:
+                # Like Gmail's metadata format, IMAP can list headers only
+                emails = self.email_auth.fetch_emails(query=query, max_emails=max_emails,
+                                                      lazy=not ReceiptParserFactory.needs_body())
+                keys = [self._get_cache_key(email_data) for email_data in emails]
+                parsed = parser_cache.get_many(keys) if parser_cache else {}
+                email_keys = keys
+            
+            subjects = {}
+            to_parse = []
+            for key, email_data in zip(email_keys, emails):
+                subjects[key] = email_data.get('subject', 'No Subject')
+                if key not in parsed:
+                    to_parse.append((key, email_data))
+            
+            logger.info(f"Found {len(keys)} emails matching query "
+                        f"({len(keys) - len(to_parse)} already parsed)")
+            
+            # Parsing is CPU-bound, so spread it across processes; filtering and
+            # saving stay in this process so the config is never shipped to workers
+            if to_parse:
+                results = self.receipt_parser.parse_batch([email_data for _, email_data in to_parse])
+                new_parsed = dict(zip((key for key, _ in to_parse), results))
+                
+                parsed.update(new_parsed)
+                if parser_cache:
+                    parser_cache.put_many(new_parsed)
+        finally:
+            if parser_cache:
+                parser_cache.close()
         
-        for i, email_data in enumerate(emails):
-            logger.info(f"Processing email {i+1}/{len(emails)}: {email_data.get('subject', 'No Subject')}")
+        receipts = self._pending if stream_to_sheets else []
+        kept = 0
+        n = len(keys)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        save_dir = self._get_save_dir()
+        confident = _confident_mask([parsed.get(key) for key in keys])
+        
+        for i, key in enumerate(keys):
+            if (i + 1) % 100 == 0:
+                logger.info("Processed %d/%d emails", i + 1, n)
+            
+            if key not in parsed:
+                # The message could not be fetched
+                continue
             
+            receipt_data = parsed[key]
+            if debug:
+                if key in subjects:
+                    subject = subjects[key]
+                else:
+                    subject = receipt_data.get('email_subject', 'No Subject') if receipt_data else 'No Subject'
+                logger.debug("Processing email %d/%d: %s", i + 1, n, subject)
+            
+            if receipt_data is not None and self._collect_receipt(receipt_data, i, receipts,
+                                                                  confident[i], save_dir):
+                kept += 1
+                if stream_to_sheets:
+                    self._schedule_flush()
+        
+        if stream_to_sheets:
+            self._flush_pending(threshold=1)
+        self._wait_io()
+        
+        logger.info(f"Successfully processed {kept} receipts")
+        return list(receipts)
+    
+    async def fetch_and_process_emails_async(self, stream_to_sheets: bool = False) -> List[Dict]:
+        """
+        Fetch and parse emails as an asyncio pipeline (Gmail API only)
+        
+        One coroutine streams message IDs from messages.list into a bounded
+        queue, a pool of coroutines drains it into batch fetches, and parsing
+        runs in a process pool so network waits overlap with parse CPU time.
+        
+        Args:
+            stream_to_sheets: Write receipts to the spreadsheet in batches as
+                they are found instead of returning them all at the end
+        
+        Returns:
+            List[Dict]: Receipts found; when streaming, only the receipts that
+                could not be written to the spreadsheet
+        """
+        if not isinstance(self.email_auth, GmailAPIAuthenticator) or not self.email_auth.is_authenticated():
+            logger.error("Gmail API authentication not set up")
+            return []
+        
+        email_config = self.config["email"]
+        query = self._build_query()
+        max_emails = email_config["max_emails"]
+        fields = email_config["gmail_fields"]
+        gmail_format = self._get_gmail_format()
+        
+        logger.info(f"Fetching emails with query: {query}")
+        self._make_receipts_dir()
+        
+        loop = asyncio.get_running_loop()
+        parser_cache = self._open_parser_cache()
+        queue = asyncio.Queue(maxsize=200)
+        flush_lock = asyncio.Lock()
+        receipts = self._pending if stream_to_sheets else []
+        processed = 0
+        kept = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        save_dir = self._get_save_dir()
+        
+        async def produce(session):
             try:
-                receipt_data = self.receipt_parser.parse(email_data)
+                async for message_ids in self.email_auth.list_message_pages_async(
+                        session, query=query, max_emails=max_emails):
+                    for message_id in message_ids:
+                        await queue.put(message_id)
+            finally:
+                # One sentinel per consumer
+                for _ in range(ASYNC_FETCH_WORKERS):
+                    await queue.put(None)
+        
+        async def flush(threshold=SHEETS_FLUSH_SIZE):
+            # One spreadsheet write at a time, off the event loop
+            async with flush_lock:
+                await loop.run_in_executor(self._get_io_pool(), self._flush_pending, threshold)
+        
+        async def consume(session, executor):
+            nonlocal processed, kept
+            done = False
+            
+            while not done:
+                message_id = await queue.get()
+                if message_id is None:
+                    break
+                
+                # Take whatever else is already queued, up to a full batch
+                message_ids = [message_id]
+                while len(message_ids) < MAX_GMAIL_BATCH_SIZE and not queue.empty():
+                    message_id = queue.get_nowait()
+                    if message_id is None:
+                        done = True
+                        break
+                    message_ids.append(message_id)
+                
+                # Only download and parse messages without a cached parse
+                parsed = parser_cache.get_many(message_ids) if parser_cache else {}
+                missing_ids = [message_id for message_id in message_ids if message_id not in parsed]
                 
-                # Only include receipts with sufficient confidence
-                if receipt_data["confidence"] >= 0.3:
-                    receipts.append(receipt_data)
+                try:
+                    emails = await self.email_auth.fetch_emails_bulk_async(
+                        session, missing_ids, fields=fields, format=gmail_format) if missing_ids else []
+                except Exception as e:
+                    logger.error(f"Error fetching emails: {str(e)}")
+                    emails = []
+                
+                new_parsed = dict(zip(
+                    (email_data['id'] for email_data in emails),
+                    await asyncio.gather(*(
+                        loop.run_in_executor(executor, parse_in_worker, email_data)
+                        for email_data in emails
+                    ))
+                ))
+                parsed.update(new_parsed)
+                if parser_cache:
+                    parser_cache.put_many(new_parsed)
+                
+                batch = [parsed.get(message_id) for message_id in message_ids]
+                confident = _confident_mask(batch)
+                
+                for message_id, receipt_data, keep in zip(message_ids, batch, confident):
+                    if message_id not in parsed:
+                        continue
                     
-                    # Save receipt data if configured
-                    if self.config["output"]["save_receipts"]:
-                        self._save_receipt_data(receipt_data, i)
-                else:
-                    logger.info(f"Skipping email with low confidence: {receipt_data['confidence']}")
-            except Exception as e:
-                logger.error(f"Error processing email: {str(e)}")
+                    if debug:
+                        subject = receipt_data.get('email_subject', 'No Subject') if receipt_data else 'No Subject'
+                        logger.debug("Processing email %d/~%s: %s", processed + 1,
+                                     self.email_auth.result_size_estimate, subject)
+                    
+                    if receipt_data is not None and self._collect_receipt(receipt_data, processed, receipts,
+                                                                          keep, save_dir):
+                        kept += 1
+                    processed += 1
+                    
+                    if processed % 100 == 0:
+                        logger.info("Processed %d/~%s emails", processed,
+                                    self.email_auth.result_size_estimate)
+                
+                if stream_to_sheets and len(self._pending) >= SHEETS_FLUSH_SIZE:
+                    await flush()
+        
+        connector = aiohttp.TCPConnector(limit=10, keepalive_timeout=60)
+        
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                with self.receipt_parser.worker_pool() as executor:
+                    await asyncio.gather(
+                        produce(session),
+                        *(consume(session, executor) for _ in range(ASYNC_FETCH_WORKERS))
+                    )
+        finally:
+            if parser_cache:
+                parser_cache.close()
+        
+        if stream_to_sheets:
+            await flush(threshold=1)
+        await loop.run_in_executor(None, self._wait_io)
+        
+        logger.info(f"Found {processed} emails matching query")
+        logger.info(f"Successfully processed {kept} receipts")
+        return list(receipts)
+    
+    def _build_query(self) -> str:
+        """
+        Build the email search query from the configuration
+        
+        For the Gmail API, trusted senders are OR-ed into the search query and
+        the result is restricted to recent mail, so fewer emails reach the
+        parser. IMAP search criteria are used as configured.
+        """
+        email_config = self.config["email"]
+        query = email_config["search_query"]
+        
+        if email_config["auth_type"] != "gmail_api":
+            return query
+        
+        senders = email_config["trusted_senders"]
+        if senders:
+            query = f"({query} OR from:({' OR '.join(senders)}))"
+        
+        since = email_config["since"]
+        if since:
+            # Relative ages (e.g. 90d, 6m, 1y) or an absolute date
+            if since[-1] in "dmy" and since[:-1].isdigit():
+                query = f"{query} newer_than:{since}"
+            else:
+                query = f"{query} after:{since.replace('-', '/')}"
         
-        logger.info(f"Successfully processed {len(receipts)} receipts")
-        return receipts
+        return query
+    
+    def _open_parser_cache(self) -> Optional[ParserCache]:
+        """Open the parser result cache, or return None if it is disabled"""
+        output_config = self.config["output"]
+        if not output_config["parser_cache"]:
+            return None
+        
+        cache_file = os.path.join(output_config["receipts_dir"], "parser_cache.sqlite")
+        parser_cache = ParserCache(cache_file, PARSER_VERSION)
+        if not parser_cache.open():
+            return None
+        return parser_cache
+    
+    def _get_cache_key(self, email_data: Dict) -> str:
+        """Get the parser cache key for an email"""
+        # Gmail message IDs are immutable; IMAP sequence numbers are not, so
+        # key those emails by a hash of the content the parser reads
+        if isinstance(self.email_auth, GmailAPIAuthenticator):
+            return email_data['id']
+        
+        content = '\0'.join(str(email_data.get(field, ''))
+                             for field in ('subject', 'from', 'date', 'body'))
+        return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    def _get_gmail_format(self) -> str:
+        """Get the Gmail message format to request"""
+        # Header-only responses are much smaller, but only enough for a
+        # parser that does not read the body
+        return "full" if ReceiptParserFactory.needs_body() else "metadata"
+    
+    def _get_save_dir(self) -> Optional[str]:
+        """Get the directory receipts are saved to, or None if saving is disabled"""
+        output_config = self.config["output"]
+        return output_config["receipts_dir"] if output_config["save_receipts"] else None
+    
+    def _collect_receipt(self, receipt_data: Dict, index: int, receipts: List[Dict],
+                         confident: bool, save_dir: Optional[str]) -> bool:
+        """Keep a parsed receipt if its confidence is high enough, returning True if kept"""
+        try:
+            # Only include receipts with sufficient confidence (see _confident_mask)
+            if confident:
+                receipts.append(receipt_data)
+                
+                # Save receipt data if configured, off the processing thread
+                if save_dir is not None:
+                    self._io_futures.append(
+                        self._get_io_pool().submit(self._save_receipt_data, receipt_data, index, save_dir))
+                return True
+            else:
+                logger.debug("Skipping email with low confidence: %s", receipt_data['confidence'])
+        except Exception as e:
+            logger.error(f"Error processing email: {str(e)}")
+        return False
     
-    def _save_receipt_data(self, receipt_data: Dict, index: int) -> None:
-        """Save receipt data to file"""
-        receipts_dir = self.config["output"]["receipts_dir"]
+    def _flush_pending(self, threshold: int = SHEETS_FLUSH_SIZE) -> bool:
+        """
+        Write buffered receipts to the spreadsheet once enough have been collected
         
-        # Create directory if it doesn't exist
-        if not os.path.exists(receipts_dir):
-            os.makedirs(receipts_dir)
+        Args:
+            threshold: Minimum number of buffered receipts to write
+        
+        Returns:
+            bool: True if nothing was due or the write succeeded, False otherwise
+        """
+        # Flushes may run on the I/O pool; only one writes at a time
+        with self._flush_lock:
+            # Rows a failed write could not send stay buffered in the integration
+            unsent = self._unsent_rows()
+            if not unsent and (not self._pending or len(self._pending) < threshold):
+                return True
+            
+            # Set up Sheets on first use, so runs without receipts skip it;
+            # after a failed setup receipts just stay buffered in _pending
+            if not self._sheets_ready:
+                if self._sheets_failed:
+                    return False
+                
+                logger.info("Setting up Google Sheets integration")
+                self._sheets_ready = self.setup_sheets_integration()
+                if not self._sheets_ready:
+                    logger.error("Failed to set up Google Sheets integration")
+                    self._sheets_failed = True
+                    return False
+            
+            # Receipts may still be appended while this batch is being written.
+            # The batch is handed to the integration once; retries only send
+            # the rows it could not append, so none lands in the sheet twice
+            batch = self._pending[:]
+            del self._pending[:len(batch)]
+            
+            for attempt in range(SHEETS_FLUSH_RETRIES):
+                if attempt:
+                    time.sleep(2 ** attempt)
+                
+                if self.add_receipts_to_spreadsheet(batch if attempt == 0 else []):
+                    return True
+            
+            # Unsent rows stay buffered so the next flush retries them
+            logger.error(f"Failed to add {self._unsent_rows()} rows to spreadsheet, will retry")
+            return False
+    
+    def _unsent_rows(self) -> int:
+        """Number of rows a failed spreadsheet write left buffered in the integration"""
+        return len(self.sheets_integration.row_buffer) if self.sheets_integration else 0
+    
+    def _schedule_flush(self) -> None:
+        """Start a background spreadsheet write if enough receipts are buffered"""
+        if len(self._pending) < SHEETS_FLUSH_SIZE:
+            return
+        
+        if self._flush_future is None or self._flush_future.done():
+            self._flush_future = self._get_io_pool().submit(self._flush_pending)
+    
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        """Get the I/O thread pool, creating it if needed"""
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(max_workers=IO_POOL_WORKERS,
+                                               thread_name_prefix='scraper-io')
+        return self._io_pool
+    
+    def _shutdown_io_pool(self) -> None:
+        """Wait for queued I/O and shut the thread pool down, so the next run starts a new one"""
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=True)
+            self._io_pool = None
+    
+    def _wait_io(self) -> None:
+        """Wait for background receipt saves to finish"""
+        wait(self._io_futures)
+        self._io_futures = []
+    
+    def _make_receipts_dir(self) -> None:
+        """Create the receipts directory once up front instead of on every save"""
+        output_config = self.config["output"]
+        if output_config["save_receipts"] or output_config["parser_cache"]:
+            os.makedirs(output_config["receipts_dir"], exist_ok=True)
+    
+    def _open_receipts_file(self) -> None:
+        """Open the shared receipts.jsonl file if receipts are saved to it"""
+        output_config = self.config["output"]
+        
+        if not output_config["save_receipts"] or output_config["per_file"]:
+            return
+        
+        self._make_receipts_dir()
+        self._receipt_fp = open(os.path.join(output_config["receipts_dir"], "receipts.jsonl"), 'ab',
+                                buffering=1 << 20)
+    
+    def _close_receipts_file(self) -> None:
+        """Close the shared receipts.jsonl file if it is open"""
+        if self._receipt_fp is not None:
+            self._receipt_fp.close()
+            self._receipt_fp = None
+    
+    def _save_receipt_data(self, receipt_data: Dict, index: int, receipts_dir: str = None) -> None:
+        """Save receipt data to file (in receipts_dir, or the configured directory)"""
+        # Append to the shared JSONL file when it is open
+        if self._receipt_fp is not None:
+            try:
+                self._receipt_fp.write(_dump_json(receipt_data, indent=False) + b'\n')
+            except Exception as e:
+                logger.error(f"Error saving receipt data: {str(e)}")
+            return
+        
+        if receipts_dir is None:
+            receipts_dir = self.config["output"]["receipts_dir"]
         
         # Generate filename
         vendor = receipt_data.get("vendor", "unknown")
         date = receipt_data.get("date", datetime.now().strftime("%Y-%m-%d"))
-        filename = f"{receipts_dir}/receipt_{date}_{vendor}_{index}.json"
+        filename = os.path.join(receipts_dir, f"receipt_{_slug(str(date))}_{_slug(str(vendor))}_{index}.json")
         
         # Save to file
         try:
-            with open(filename, 'w') as f:
-                json.dump(receipt_data, f, indent=2, default=str)
+            with open(filename, 'wb') as f:
+                f.write(_dump_json(receipt_data))
         except Exception as e:
             logger.error(f"Error saving receipt data: {str(e)}")
     
     def add_receipts_to_spreadsheet(self, receipts: List[Dict]) -> bool:
-        """Add receipt data to Google Sheets"""
+        """Add receipt data, and any rows left unsent by an earlier call, to Google Sheets"""
         if not self.sheets_integration or not self.sheets_integration.is_authenticated():
             logger.error("Google Sheets integration not set up")
             return False
         
-        if not receipts:
+        unsent = len(self.sheets_integration.row_buffer)
+        if not receipts and not unsent:
             logger.info("No receipts to add to spreadsheet")
             return True
         
         spreadsheet_id = self.config["sheets"]["spreadsheet_id"]
         
-        logger.info(f"Adding {len(receipts)} receipts to spreadsheet")
+        if unsent:
+            logger.info(f"Adding {len(receipts)} receipts and {unsent} unsent rows to spreadsheet")
+        else:
+            logger.info(f"Adding {len(receipts)} receipts to spreadsheet")
         result = self.sheets_integration.add_multiple_receipts(spreadsheet_id, receipts)
         
         if result:
@@ -239,29 +781,78 @@ class EmailReceiptScraper:
             logger.error("Failed to set up email authentication")
             return False
         
-        # Set up Google Sheets integration
-        logger.info("Setting up Google Sheets integration")
-        if not self.setup_sheets_integration():
-            logger.error("Failed to set up Google Sheets integration")
+        # Fetch and process emails
+        # Receipts are written to the spreadsheet in batches as they are found;
+        # Google Sheets is only set up once the first batch needs writing
+        logger.info("Fetching and processing emails")
+        self._sheets_failed = False
+        self._open_receipts_file()
+        try:
+            unsaved = self.fetch_and_process_emails(stream_to_sheets=True)
+        finally:
+            self._shutdown_io_pool()
+            self._close_receipts_file()
+        
+        # Rows handed to the integration that it could not append count too
+        if unsaved or self._unsent_rows():
+            logger.error("Failed to add receipts to spreadsheet")
+            return False
+        
+        logger.info("Email receipt scraping completed successfully")
+        return True
+    
+    async def run_async(self) -> bool:
+        """Run the complete scraping process with the async fetch pipeline"""
+        if not AIOHTTP_AVAILABLE:
+            logger.error("aiohttp not available. Install with: pip install aiohttp")
+            return False
+        
+        logger.info("Starting email receipt scraper (async)")
+        
+        # Set up email authentication
+        logger.info("Setting up email authentication")
+        if not self.setup_email_auth():
+            logger.error("Failed to set up email authentication")
+            return False
+        
+        if not isinstance(self.email_auth, GmailAPIAuthenticator):
+            logger.error("The async pipeline requires the gmail_api auth type")
             return False
         
         # Fetch and process emails
+        # Receipts are written to the spreadsheet in batches as they are found;
+        # Google Sheets is only set up once the first batch needs writing
         logger.info("Fetching and processing emails")
-        receipts = self.fetch_and_process_emails()
+        self._sheets_failed = False
+        self._open_receipts_file()
+        try:
+            unsaved = await self.fetch_and_process_emails_async(stream_to_sheets=True)
+        finally:
+            self._shutdown_io_pool()
+            self._close_receipts_file()
         
-        # Add receipts to spreadsheet
-        if receipts:
-            logger.info("Adding receipts to spreadsheet")
-            if not self.add_receipts_to_spreadsheet(receipts):
-                logger.error("Failed to add receipts to spreadsheet")
-                return False
-        else:
-            logger.info("No receipts found")
+        # Rows handed to the integration that it could not append count too
+        if unsaved or self._unsent_rows():
+            logger.error("Failed to add receipts to spreadsheet")
+            return False
         
         logger.info("Email receipt scraping completed successfully")
         return True
 
 
+# Command line argument -> (config section, config key)
+_ARG_MAP = {
+    'auth_type': ('email', 'auth_type'),
+    'email': ('email', 'email_address'),
+    'password': ('email', 'password'),
+    'imap_server': ('email', 'imap_server'),
+    'query': ('email', 'search_query'),
+    'max': ('email', 'max_emails'),
+    'spreadsheet_id': ('sheets', 'spreadsheet_id'),
+    'spreadsheet_title': ('sheets', 'spreadsheet_title'),
+    'since': ('email', 'since')
+}
+
 def main():
     """Main entry point for the script"""
     parser = argparse.ArgumentParser(description='Email Receipt Scraper')
@@ -275,8 +866,12 @@ def main():
     parser.add_argument('--credentials', help='Path to credentials.json file')
     parser.add_argument('--query', help='Search query for emails')
     parser.add_argument('--max', type=int, help='Maximum number of emails to fetch')
+    parser.add_argument('--since', help='Only fetch emails newer than an age (e.g. 30d) or after a date '
+                                        '(e.g. 2025/01/01) (Gmail API only)')
     parser.add_argument('--spreadsheet-id', help='ID of an existing spreadsheet')
     parser.add_argument('--spreadsheet-title', help='Title for a new spreadsheet')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Use the asyncio fetch/parse pipeline (Gmail API only, requires aiohttp)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
     args = parser.parse_args()
@@ -289,25 +884,15 @@ def main():
     scraper = EmailReceiptScraper(args.config)
     
     # Update config from command line arguments
-    if args.auth_type:
-        scraper.config["email"]["auth_type"] = args.auth_type
-    if args.email:
-        scraper.config["email"]["email_address"] = args.email
-    if args.password:
-        scraper.config["email"]["password"] = args.password
-    if args.imap_server:
-        scraper.config["email"]["imap_server"] = args.imap_server
+    for arg, (section, key) in _ARG_MAP.items():
+        value = getattr(args, arg)
+        if value:
+            scraper.config[section][key] = value
+    
+    # The credentials file is shared by Gmail and Sheets
     if args.credentials:
         scraper.config["email"]["credentials_file"] = args.credentials
         scraper.config["sheets"]["credentials_file"] = args.credentials
-    if args.query:
-        scraper.config["email"]["search_query"] = args.query
-    if args.max:
-        scraper.config["email"]["max_emails"] = args.max
-    if args.spreadsheet_id:
-        scraper.config["sheets"]["spreadsheet_id"] = args.spreadsheet_id
-    if args.spreadsheet_title:
-        scraper.config["sheets"]["spreadsheet_title"] = args.spreadsheet_title
     
     # Save config if requested
     if args.save_config:
@@ -317,7 +902,10 @@ def main():
             logger.error(f"Failed to save configuration to {args.save_config}")
     
     # Run the scraper
-    success = scraper.run()
+    if args.use_async:
+        success = asyncio.run(scraper.run_async())
+    else:
+        success = scraper.run()
     
     if success:
         spreadsheet_id = scraper.config["sheets"]["spreadsheet_id"]
@@ -7,24 +7,260 @@ using either Gmail API or IMAP protocols.
 """
 
 import os
-import pickle
-import base64
+import re
+import json
+import hmac
+import uuid
+import zlib
+import quopri
+import binascii
 import imaplib
 import email
-from email.header import decode_header
+import email.policy
+from email.parser import BytesParser
 import getpass
-from typing import Dict, List, Tuple, Optional, Any, Union
+import asyncio
+import importlib.util
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from urllib.parse import urlencode
+from typing import Dict, List, Tuple, Optional, Any, Union, AsyncIterator, TYPE_CHECKING
 
-# Gmail API imports
+if TYPE_CHECKING:
+    from src.seen_filter import SeenFilter
+
+# Gmail API imports are slow, so they are only checked for here and
+# imported by _import_gmail_api() when a Gmail authenticator is created
+try:
+    GMAIL_API_AVAILABLE = all(
+        importlib.util.find_spec(name) is not None
+        for name in ('google.auth', 'google.oauth2', 'google_auth_oauthlib',
+                     'googleapiclient', 'google_auth_httplib2', 'httplib2'))
+except ImportError:
+    GMAIL_API_AVAILABLE = False
+
+# Async HTTP imports
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Fast JSON imports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Base64 decoding, using pybase64's SIMD kernels when available
+try:
+    from pybase64 import urlsafe_b64decode
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    from base64 import urlsafe_b64decode
+    PYBASE64_AVAILABLE = False
+
+# Fast MIME parser imports
 try:
+    from fast_mail_parser import parse_email, ParseError
+    FAST_MAIL_PARSER_AVAILABLE = True
+except ImportError:
+    FAST_MAIL_PARSER_AVAILABLE = False
+
+GMAIL_API_URL = 'https://gmail.googleapis.com/gmail/v1/users/me'
+GMAIL_BATCH_URL = 'https://gmail.googleapis.com/batch/gmail/v1'
+
+# Gmail accepts at most 100 calls in a single batch request
+MAX_GMAIL_BATCH_SIZE = 100
+
+# Threads used to fetch messages one by one when batching is not an option
+FETCH_THREADS = 10
+
+# Batch requests in flight at once in fetch_emails_async and on the executor
+# in fetch_emails_bulk; each batch of 100 gets costs 500 quota units against
+# Gmail's per-user limit of 250 a second
+ASYNC_BATCH_CONCURRENCY = 4
+
+# IMAP servers for well-known email domains; add entries to support more
+IMAP_SERVERS = {
+    'gmail.com': 'imap.gmail.com',
+    'googlemail.com': 'imap.gmail.com',
+    'outlook.com': 'outlook.office365.com',
+    'hotmail.com': 'outlook.office365.com',
+    'live.com': 'outlook.office365.com',
+    'yahoo.com': 'imap.mail.yahoo.com',
+    'icloud.com': 'imap.mail.me.com',
+    'me.com': 'imap.mail.me.com',
+    'fastmail.com': 'imap.fastmail.com',
+    'aol.com': 'imap.aol.com',
+}
+
+# Messages requested per IMAP FETCH command
+IMAP_FETCH_CHUNK = 200
+
+# Items fetched per message when listing IMAP emails without their bodies
+IMAP_HEADER_FETCH = '(BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE)])'
+
+# Tokens of an IMAP parenthesized list: '(', ')', a quoted string or an atom
+_IMAP_TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|([^\s()"]+))')
+
+# RFC 2047 encoded words, and the whitespace between adjacent ones (which
+# is not part of the decoded text)
+_ENCODED_WORD_RE = re.compile(r'=\?([^?\s]+)\?([BbQq])\?([^?\s]*)\?=')
+_ENCODED_WORD_GAP_RE = re.compile(r'(?<=\?=)\s+(?==\?)')
+
+# Header-only parser for lazy listings; the default policy decodes
+# RFC 2047 words itself
+_HEADER_PARSER = BytesParser(policy=email.policy.default)
+
+# UID item in an IMAP FETCH response line, e.g. b'12 (UID 345 BODY[] {2048}'
+_IMAP_UID_RE = re.compile(rb'UID (\d+)')
+
+# Seconds between NOOPs that keep pooled IMAP connections from timing out
+# (servers may drop idle connections after 30 minutes)
+IMAP_KEEPALIVE_INTERVAL = 25 * 60
+
+# Partial-response field masks for messages.get, keyed by message format
+GMAIL_DEFAULT_FIELDS = {
+    'metadata': ['id', 'threadId', 'internalDate', 'labelIds', 'payload/headers'],
+    'full': ['id', 'threadId', 'internalDate', 'labelIds', 'payload'],
+}
+
+# Headers returned for 'metadata' format messages (the only ones read)
+GMAIL_METADATA_HEADERS = ['Subject', 'From', 'To', 'Date']
+
+# Pieces of a multipart batch response
+_BOUNDARY_RE = re.compile(r'boundary="?([^";\s]+)"?', re.IGNORECASE)
+_BLANK_LINE_RE = re.compile(rb'\r?\n\r?\n')
+_CONTENT_ID_RE = re.compile(rb'^content-id:[ \t]*<?(?:response-)?([^>\r\n]*)>?',
+                            re.IGNORECASE | re.MULTILINE)
+
+def _import_gmail_api() -> None:
+    """Import the Gmail API client libraries into this module on first use"""
+    global Request, Credentials, InstalledAppFlow, build, HttpError
+    global google_auth_httplib2, httplib2
+    
     from google.auth.transport.requests import Request
     from google.oauth2.credentials import Credentials
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
-    GMAIL_API_AVAILABLE = True
-except ImportError:
-    GMAIL_API_AVAILABLE = False
+    import google_auth_httplib2
+    import httplib2
+
+def _split_headers(data: bytes) -> Tuple[bytes, bytes]:
+    """Split a header block from what follows its blank line"""
+    match = _BLANK_LINE_RE.search(data)
+    if match is None:
+        return data, b''
+    return data[:match.start()], data[match.end():]
+
+def _parse_batch_response(content_type: str, content: bytes) -> Dict[str, Tuple[int, str]]:
+    """
+    Split a multipart/mixed batch response into its HTTP responses
+    
+    Args:
+        content_type: Content-Type header of the batch response
+        content: Raw body of the batch response
+        
+    Returns:
+        Dictionary mapping each part's Content-ID to (status, body)
+    """
+    match = _BOUNDARY_RE.search(content_type)
+    if match is None:
+        raise ValueError(f"No boundary in batch response Content-Type: {content_type}")
+    delimiter = b'--' + match.group(1).encode()
+    
+    responses = {}
+    
+    # Scan for the boundaries with bytes.find rather than running the MIME
+    # parser over every message body in the batch
+    pos = content.find(delimiter)
+    while pos != -1:
+        start = pos + len(delimiter)
+        if content.startswith(b'--', start):
+            break
+        
+        pos = content.find(delimiter, start)
+        part = content[start:] if pos == -1 else content[start:pos]
+        
+        # Skip the rest of the boundary line; the line break before the next
+        # boundary belongs to that boundary
+        part = part[part.find(b'\n') + 1:]
+        if part.endswith(b'\r\n'):
+            part = part[:-2]
+        elif part.endswith(b'\n'):
+            part = part[:-1]
+        
+        # Each part is an HTTP response: status line, headers, blank line, body
+        part_headers, http_response = _split_headers(part)
+        status_line, _, http_response = http_response.partition(b'\n')
+        _, body = _split_headers(http_response)
+        
+        content_id = _CONTENT_ID_RE.search(part_headers)
+        content_id = content_id.group(1).decode() if content_id else ''
+        
+        responses[content_id] = (int(status_line.split(None, 2)[1]), body.decode('utf-8'))
+    
+    return responses
+
+def _parse_imap_list(data: bytes, pos: int = 0) -> Tuple[Any, int]:
+    """
+    Parse one parenthesized list (e.g. a BODYSTRUCTURE) from an IMAP response
+    
+    Args:
+        data: IMAP response bytes
+        pos: Offset of the opening parenthesis
+        
+    Returns:
+        Tuple of (nested lists of strings, with NIL as None; offset after the list)
+    """
+    stack = []
+    current = None
+    
+    while True:
+        match = _IMAP_TOKEN_RE.match(data, pos)
+        if match is None:
+            raise ValueError(f"Malformed IMAP list at offset {pos}")
+        pos = match.end()
+        
+        opening, closing, quoted, atom = match.groups()
+        if opening:
+            if current is not None:
+                stack.append(current)
+            current = []
+        elif closing:
+            if not stack:
+                return current, pos
+            finished = current
+            current = stack.pop()
+            current.append(finished)
+        elif quoted is not None:
+            current.append(re.sub(rb'\\(.)', rb'\1', quoted).decode('utf-8', 'replace'))
+        else:
+            current.append(None if atom.upper() == b'NIL' else atom.decode('utf-8', 'replace'))
+
+def _decode_encoded_word(match: 're.Match') -> str:
+    """Decode one RFC 2047 encoded word, leaving it as is if it is invalid"""
+    charset, encoding, text = match.groups()
+    
+    try:
+        if encoding in 'Bb':
+            raw = binascii.a2b_base64(text + '=' * (-len(text) % 4))
+        else:
+            raw = binascii.a2b_qp(text, header=True)
+        # Drop any RFC 2231 language suffix, e.g. utf-8*en
+        return raw.decode(charset.split('*', 1)[0], 'replace')
+    except (LookupError, ValueError):
+        return match.group(0)
+
+def _imap_params(params: Optional[List]) -> Dict[str, str]:
+    """Turn an IMAP ("key" "value" ...) parameter list into a dictionary"""
+    if not isinstance(params, list):
+        return {}
+    return {str(key).lower(): value for key, value in zip(params[::2], params[1::2])}
+
 
 class EmailAuthenticator:
     """Base class for email authentication"""
@@ -54,7 +290,9 @@ class GmailAPIAuthenticator(EmailAuthenticator):
     
     def __init__(self, credentials_file: str = 'credentials.json', 
                  token_file: str = 'token.json',
-                 scopes: List[str] = None):
+                 scopes: List[str] = None,
+                 http: Any = None,
+                 seen_filter: 'SeenFilter' = None):
         """
         Initialize Gmail API authenticator
         
@@ -62,10 +300,19 @@ class GmailAPIAuthenticator(EmailAuthenticator):
             credentials_file: Path to the credentials.json file
             token_file: Path to save/load the token
             scopes: OAuth scopes to request
+            http: Shared httplib2.Http connection pool to send requests on
+            seen_filter: Loaded src.seen_filter.SeenFilter; when given,
+                fetch_emails only returns messages newer than, and not among,
+                those it has fetched before
         """
         super().__init__()
+        if GMAIL_API_AVAILABLE:
+            _import_gmail_api()
+        
         self.credentials_file = credentials_file
         self.token_file = token_file
+        self.http = http
+        self.seen_filter = seen_filter
         
         # Default scopes if none provided
         if scopes is None:
@@ -75,6 +322,15 @@ class GmailAPIAuthenticator(EmailAuthenticator):
             
         self.creds = None
         self.service = None
+        
+        # Gmail's estimate of the number of matches for the last listing
+        self.result_size_estimate = None
+        
+        # Whether the last list_message_ids call returned every match
+        self.listing_complete = False
+        
+        # Per-thread HTTP connections for batches run on an executor
+        self._local = threading.local()
     
     def authenticate(self) -> bool:
         """
@@ -92,7 +348,14 @@ class GmailAPIAuthenticator(EmailAuthenticator):
             # Check if we already have valid credentials
             if os.path.exists(self.token_file):
                 with open(self.token_file, 'rb') as token:
-                    self.creds = pickle.load(token)
+                    data = token.read()
+                try:
+                    info = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+                    self.creds = Credentials.from_authorized_user_info(info, self.scopes)
+                except ValueError:
+                    # Tokens saved by older versions were pickled; log in again
+                    print(f"Ignoring unreadable token file '{self.token_file}'.")
+                    self.creds = None
             
             # If no valid credentials available, let the user log in
             if not self.creds or not self.creds.valid:
@@ -109,11 +372,15 @@ class GmailAPIAuthenticator(EmailAuthenticator):
                     self.creds = flow.run_local_server(port=0)
                 
                 # Save the credentials for the next run
-                with open(self.token_file, 'wb') as token:
-                    pickle.dump(self.creds, token)
+                with open(self.token_file, 'w') as token:
+                    token.write(self.creds.to_json())
             
-            # Build the Gmail API service
-            self.service = build('gmail', 'v1', credentials=self.creds)
+            # Build the Gmail API service, on the shared connection pool if given
+            if self.http is not None:
+                self.service = build('gmail', 'v1', http=google_auth_httplib2.AuthorizedHttp(
+                    self.creds, http=self.http))
+            else:
+                self.service = build('gmail', 'v1', credentials=self.creds)
             self.authenticated = True
             return True
             
@@ -126,13 +393,16 @@ class GmailAPIAuthenticator(EmailAuthenticator):
         self.service = None
         self.authenticated = False
     
-    def fetch_emails(self, query: str = "ALL", max_emails: int = 100) -> List[Dict]:
+    def fetch_emails(self, query: str = "ALL", max_emails: int = 100,
+                     fields: List[str] = None, format: str = 'full') -> List[Dict]:
         """
         Fetch emails from Gmail using the Gmail API
         
         Args:
             query: Gmail search query (e.g., "subject:receipt")
             max_emails: Maximum number of emails to fetch
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
             
         Returns:
             List of email dictionaries with metadata and content
@@ -140,96 +410,487 @@ class GmailAPIAuthenticator(EmailAuthenticator):
         if not self.is_authenticated():
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
-        try:
-            # Get list of messages matching query
-            results = self.service.users().messages().list(
-                userId='me', q=query, maxResults=max_emails).execute()
-            
-            messages = results.get('messages', [])
-            
-            if not messages:
-                print("No messages found.")
-                return []
-            
-            email_list = []
+        seen = self.seen_filter
+        if seen is not None and seen.last_seen:
+            # Let Gmail's index drop everything older than the newest message
+            # already fetched (after: takes seconds since the epoch)
+            query = f"{query} after:{seen.last_seen // 1000}"
+        
+        # Get list of messages matching query
+        message_ids = self.list_message_ids(query=query, max_emails=max_emails)
+        
+        if seen is not None:
+            message_ids = [message_id for message_id in message_ids if message_id not in seen]
+        
+        if not message_ids:
+            print("No messages found.")
+            return []
+        
+        # Fetch the messages in batches of up to 100 per round trip
+        email_list = self.fetch_emails_bulk(message_ids, fields=fields, format=format)
+        
+        if seen is not None:
+            # A listing cut off by max_emails skipped older matches, so the
+            # after: cutoff must not move past them; the filter alone keeps
+            # the fetched ones from being fetched again
+            complete = self.listing_complete
+            for email_data in email_list:
+                seen.add(email_data['id'], email_data.get('internal_date') if complete else None)
+            seen.save()
+        
+        return email_list
+    
+    def list_message_ids(self, query: str = "ALL", max_emails: int = 100) -> List[str]:
+        """
+        List the IDs of Gmail messages matching a query
+        
+        Args:
+            query: Gmail search query (e.g., "subject:receipt")
+            max_emails: Maximum number of message IDs to return
             
-            for message in messages:
-                msg = self.service.users().messages().get(
-                    userId='me', id=message['id'], format='full').execute()
-                
-                # Extract headers
-                headers = {}
-                for header in msg['payload']['headers']:
-                    headers[header['name'].lower()] = header['value']
-                
-                # Extract body
-                body = self._get_body_from_message(msg)
-                
-                # Extract attachments
-                attachments = self._get_attachments_from_message(msg)
+        Returns:
+            List of Gmail message IDs; listing_complete records whether it
+            holds every match
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        message_ids = []
+        page_token = None
+        self.listing_complete = False
+        
+        try:
+            # messages.list returns at most 500 IDs per page
+            while len(message_ids) < max_emails:
+                results = self.service.users().messages().list(
+                    userId='me', q=query, pageToken=page_token,
+                    maxResults=min(max_emails - len(message_ids), 500)).execute()
                 
-                email_data = {
-                    'id': msg['id'],
-                    'thread_id': msg['threadId'],
-                    'subject': headers.get('subject', ''),
-                    'from': headers.get('from', ''),
-                    'to': headers.get('to', ''),
-                    'date': headers.get('date', ''),
-                    'body': body,
-                    'attachments': attachments
-                }
+                message_ids.extend(message['id'] for message in results.get('messages', []))
                 
-                email_list.append(email_data)
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
             
-            return email_list
+            self.listing_complete = not page_token and len(message_ids) < max_emails
             
         except HttpError as error:
             print(f"An error occurred: {error}")
-            return []
+        
+        return message_ids
+    
+    def fetch_emails_bulk(self, message_ids: List[str], batch_size: int = None,
+                          fields: List[str] = None, format: str = 'full',
+                          executor: Executor = None) -> List[Dict]:
+        """
+        Fetch emails by ID using Gmail batch requests
+        
+        Each batch request carries up to batch_size message gets in a single
+        HTTP round trip, instead of one round trip per message.
+        
+        Args:
+            message_ids: Gmail message IDs to fetch
+            batch_size: Messages per batch request (defaults to the
+                GMAIL_BATCH_SIZE environment variable, or 100)
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
+            executor: Thread pool to send batch requests on concurrently, at
+                most ASYNC_BATCH_CONCURRENCY at a time (batches are sent one
+                after another if not given)
+            
+        Returns:
+            List of email dictionaries with metadata and content
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        fields = self._get_fields_mask(fields, format)
+        
+        if batch_size is None:
+            batch_size = int(os.environ.get('GMAIL_BATCH_SIZE', MAX_GMAIL_BATCH_SIZE))
+        batch_size = max(1, min(batch_size, MAX_GMAIL_BATCH_SIZE))
+        
+        # Responses can arrive in any order, so slot them by request ID
+        messages = [None] * len(message_ids)
+        
+        def on_response(request_id, response, exception):
+            # Failed messages stay None and are retried individually below
+            if exception is None:
+                messages[int(request_id)] = response
+        
+        # A shared I/O pool has far more threads than the quota allows batches
+        batch_slots = threading.BoundedSemaphore(ASYNC_BATCH_CONCURRENCY)
+        
+        def execute_batch(start):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            
+            for index in range(start, min(start + batch_size, len(message_ids))):
+                batch.add(
+                    self.service.users().messages().get(
+                        userId='me', id=message_ids[index], format=format,
+                        metadataHeaders=self._get_metadata_headers(format),
+                        fields=fields),
+                    request_id=str(index))
+            
+            try:
+                # httplib2 connections are not thread-safe, so batches on an
+                # executor each use their thread's own connection
+                with batch_slots:
+                    batch.execute(http=self._get_thread_http() if executor else None)
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+        
+        starts = range(0, len(message_ids), batch_size)
+        if executor is not None:
+            list(executor.map(execute_batch, starts))
+        else:
+            for start in starts:
+                execute_batch(start)
+        
+        # Retry whatever the batches did not return (e.g. rate-limited parts
+        # or a failed batch) as individual requests
+        failed = [index for index, msg in enumerate(messages) if msg is None]
+        if failed:
+            retried = self._get_messages_threaded(
+                [message_ids[index] for index in failed], fields, format, executor)
+            for index, msg in zip(failed, retried):
+                messages[index] = msg
+        
+        return [self._build_email_data(msg) for msg in messages if msg is not None]
+    
+    def fetch_emails_threaded(self, message_ids: List[str], fields: List[str] = None,
+                              format: str = 'full', executor: Executor = None) -> List[Dict]:
+        """
+        Fetch emails by ID with concurrent individual requests
+        
+        A fallback for when batch requests are not viable (e.g. very large
+        messages): one request per message, overlapped on a thread pool.
+        
+        Args:
+            message_ids: Gmail message IDs to fetch
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
+            executor: Thread pool to send requests on (a pool of
+                FETCH_THREADS threads is used if not given)
+            
+        Returns:
+            List of email dictionaries with metadata and content
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        fields = self._get_fields_mask(fields, format)
+        messages = self._get_messages_threaded(message_ids, fields, format, executor)
+        
+        return [self._build_email_data(msg) for msg in messages if msg is not None]
+    
+    def _get_messages_threaded(self, message_ids: List[str], fields: str, format: str,
+                               executor: Executor = None) -> List[Optional[Dict]]:
+        """Get raw messages concurrently, with None for messages that failed"""
+        def get_message(message_id):
+            try:
+                # Each thread sends on its own connection
+                return self.service.users().messages().get(
+                    userId='me', id=message_id, format=format,
+                    metadataHeaders=self._get_metadata_headers(format),
+                    fields=fields).execute(http=self._get_thread_http())
+            except HttpError as error:
+                print(f"Error fetching message {message_id}: {error}")
+                return None
+        
+        if executor is not None:
+            return list(executor.map(get_message, message_ids))
+        
+        with ThreadPoolExecutor(max_workers=FETCH_THREADS) as pool:
+            return list(pool.map(get_message, message_ids))
+    
+    def _get_thread_http(self) -> Any:
+        """Get the calling thread's authorized HTTP connection, creating it if needed"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http(timeout=60))
+            self._local.http = http
+        return http
+    
+    def get_access_token(self) -> str:
+        """Get a valid OAuth access token, refreshing it if it has expired"""
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        if not self.creds.valid:
+            self.creds.refresh(Request())
+        
+        return self.creds.token
+    
+    async def list_message_pages_async(self, session: 'aiohttp.ClientSession',
+                                       query: str = "ALL",
+                                       max_emails: int = 100) -> AsyncIterator[List[str]]:
+        """
+        List Gmail message IDs over aiohttp, one page at a time
+        
+        Args:
+            session: aiohttp session to issue requests on
+            query: Gmail search query (e.g., "subject:receipt")
+            max_emails: Maximum number of message IDs to return
+            
+        Yields:
+            Lists of Gmail message IDs, one per result page
+        """
+        remaining = max_emails
+        params = {'q': query}
+        self.result_size_estimate = None
+        
+        while remaining > 0:
+            params['maxResults'] = min(remaining, 500)
+            headers = {'Authorization': f'Bearer {self.get_access_token()}'}
+            
+            async with session.get(f'{GMAIL_API_URL}/messages', params=params,
+                                   headers=headers) as response:
+                response.raise_for_status()
+                results = await response.json()
+            
+            if self.result_size_estimate is None and 'resultSizeEstimate' in results:
+                self.result_size_estimate = min(results['resultSizeEstimate'], max_emails)
+            
+            message_ids = [message['id'] for message in results.get('messages', [])]
+            if message_ids:
+                yield message_ids
+            
+            remaining -= len(message_ids)
+            
+            if not results.get('nextPageToken'):
+                break
+            params['pageToken'] = results['nextPageToken']
+    
+    async def fetch_emails_bulk_async(self, session: 'aiohttp.ClientSession',
+                                      message_ids: List[str], fields: List[str] = None,
+                                      format: str = 'full') -> List[Dict]:
+        """
+        Fetch up to 100 emails by ID in a single batch request over aiohttp
+        
+        Args:
+            session: aiohttp session to issue requests on
+            message_ids: Gmail message IDs to fetch
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
+            
+        Returns:
+            List of email dictionaries with metadata and content
+        """
+        if len(message_ids) > MAX_GMAIL_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_GMAIL_BATCH_SIZE} messages can be fetched per batch")
+        
+        params = {'format': format, 'fields': self._get_fields_mask(fields, format)}
+        if self._get_metadata_headers(format):
+            params['metadataHeaders'] = self._get_metadata_headers(format)
+        query = urlencode(params, doseq=True)
+        boundary = f'batch_{uuid.uuid4().hex}'
+        
+        # One application/http part per message get
+        parts = []
+        for index, message_id in enumerate(message_ids):
+            parts.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <{index}>\r\n'
+                f'\r\n'
+                f'GET /gmail/v1/users/me/messages/{message_id}?{query}\r\n'
+                f'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n')
+        
+        headers = {
+            'Authorization': f'Bearer {self.get_access_token()}',
+            'Content-Type': f'multipart/mixed; boundary={boundary}'
+        }
+        
+        async with session.post(GMAIL_BATCH_URL, data=''.join(parts),
+                                headers=headers) as response:
+            response.raise_for_status()
+            responses = _parse_batch_response(response.headers['Content-Type'],
+                                              await response.read())
+        
+        email_list = []
+        
+        for index, message_id in enumerate(message_ids):
+            status, body = responses.get(str(index), (0, ''))
+            
+            if status != 200:
+                print(f"Error fetching message {message_id}: HTTP {status}")
+                continue
+            
+            email_list.append(self._build_email_data(json.loads(body)))
+        
+        return email_list
+    
+    async def fetch_emails_async(self, query: str = "ALL", max_emails: int = 100,
+                                 fields: List[str] = None, format: str = 'full',
+                                 concurrency: int = ASYNC_BATCH_CONCURRENCY,
+                                 session: 'aiohttp.ClientSession' = None) -> List[Dict]:
+        """
+        Fetch emails over aiohttp, with batches sent as soon as IDs are listed
+        
+        Args:
+            query: Gmail search query (e.g., "subject:receipt")
+            max_emails: Maximum number of emails to fetch
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
+            concurrency: Maximum number of batch requests in flight
+            session: aiohttp session to issue requests on (one is created if None)
+            
+        Returns:
+            List of email dictionaries with metadata and content
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp not available. Install with: pip install aiohttp")
+        
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession()
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_batch(message_ids):
+            async with semaphore:
+                return await self.fetch_emails_bulk_async(session, message_ids, fields, format)
+        
+        tasks = []
+        try:
+            # Listing the next page overlaps with fetching the previous ones
+            async for message_ids in self.list_message_pages_async(
+                    session, query=query, max_emails=max_emails):
+                for start in range(0, len(message_ids), MAX_GMAIL_BATCH_SIZE):
+                    tasks.append(asyncio.ensure_future(
+                        fetch_batch(message_ids[start:start + MAX_GMAIL_BATCH_SIZE])))
+            
+            batches = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if own_session:
+                await session.close()
+        
+        return [email_data for batch in batches for email_data in batch]
+    
+    def fetch_emails_concurrent(self, query: str = "ALL", max_emails: int = 100,
+                                fields: List[str] = None,
+                                format: str = 'full') -> List[Dict]:
+        """
+        Synchronous wrapper around fetch_emails_async
+        
+        Must not be called from a running event loop; await
+        fetch_emails_async there instead.
+        
+        Args:
+            query: Gmail search query (e.g., "subject:receipt")
+            max_emails: Maximum number of emails to fetch
+            fields: Message fields to request (defaults depend on format)
+            format: Message format, 'full' or 'metadata' (headers only)
+            
+        Returns:
+            List of email dictionaries with metadata and content
+        """
+        return asyncio.run(self.fetch_emails_async(
+            query=query, max_emails=max_emails, fields=fields, format=format))
+    
+    def _get_fields_mask(self, fields: Optional[List[str]], format: str) -> str:
+        """Build the partial-response field mask for a messages.get call"""
+        if format not in GMAIL_DEFAULT_FIELDS:
+            raise ValueError(f"Unsupported Gmail message format: {format}")
+        
+        if fields is None:
+            fields = GMAIL_DEFAULT_FIELDS[format]
+        
+        return ','.join(fields)
+    
+    def _get_metadata_headers(self, format: str) -> Optional[List[str]]:
+        """Headers to request for a messages.get call, or None for all of them"""
+        return GMAIL_METADATA_HEADERS if format == 'metadata' else None
+    
+    def _build_email_data(self, msg: Dict) -> Dict:
+        """Build an email dictionary from a Gmail API message"""
+        # Extract headers
+        headers = {}
+        for header in msg['payload']['headers']:
+            headers[header['name'].lower()] = header['value']
+        
+        # Extract body
+        body = self._get_body_from_message(msg)
+        
+        # Extract attachments
+        attachments = self._get_attachments_from_message(msg)
+        
+        return {
+            'id': msg['id'],
+            'thread_id': msg['threadId'],
+            'internal_date': int(msg.get('internalDate', 0)),
+            'subject': headers.get('subject', ''),
+            'from': headers.get('from', ''),
+            'to': headers.get('to', ''),
+            'date': headers.get('date', ''),
+            'body': body,
+            'attachments': attachments
+        }
     
     def _get_body_from_message(self, message: Dict) -> str:
         """Extract body text from a Gmail API message"""
-        if 'parts' in message['payload']:
-            for part in message['payload']['parts']:
-                if part['mimeType'] == 'text/plain' and 'data' in part['body']:
-                    return base64.urlsafe_b64decode(
-                        part['body']['data']).decode('utf-8')
-                elif part['mimeType'] == 'text/html' and 'data' in part['body']:
-                    return base64.urlsafe_b64decode(
-                        part['body']['data']).decode('utf-8')
-                elif 'parts' in part:
-                    for subpart in part['parts']:
-                        if subpart['mimeType'] == 'text/plain' and 'data' in subpart['body']:
-                            return base64.urlsafe_b64decode(
-                                subpart['body']['data']).decode('utf-8')
-        
-        # If we couldn't find the body in parts, try the payload directly
-        if 'body' in message['payload'] and 'data' in message['payload']['body']:
-            return base64.urlsafe_b64decode(
-                message['payload']['body']['data']).decode('utf-8')
+        payload = message['payload']
+        html = None
+        
+        # Depth-first over the whole MIME tree in document order: the first
+        # text/plain part wins, otherwise the first text/html part is used
+        stack = [payload]
+        while stack:
+            part = stack.pop()
+            data = part.get('body', {}).get('data')
+            if data:
+                mime_type = part.get('mimeType')
+                if mime_type == 'text/plain':
+                    return urlsafe_b64decode(data).decode('utf-8')
+                if mime_type == 'text/html' and html is None:
+                    html = data
+            
+            subparts = part.get('parts')
+            if subparts:
+                stack.extend(reversed(subparts))
+        
+        if html is not None:
+            return urlsafe_b64decode(html).decode('utf-8')
+        
+        # If no text part was found, try the payload directly
+        if 'data' in payload.get('body', {}):
+            return urlsafe_b64decode(payload['body']['data']).decode('utf-8')
         
         return ""
     
     def _get_attachments_from_message(self, message: Dict) -> List[Dict]:
         """Extract attachments from a Gmail API message"""
         attachments = []
+        append = attachments.append
         
-        def extract_attachments_from_parts(parts):
-            for part in parts:
-                if 'filename' in part and part['filename']:
-                    attachment = {
-                        'id': part['body'].get('attachmentId', ''),
-                        'filename': part['filename'],
-                        'mimeType': part['mimeType'],
-                        'size': part['body'].get('size', 0)
-                    }
-                    attachments.append(attachment)
-                
-                if 'parts' in part:
-                    extract_attachments_from_parts(part['parts'])
-        
-        if 'parts' in message['payload']:
-            extract_attachments_from_parts(message['payload']['parts'])
+        # Walk the MIME tree with an explicit stack instead of recursing;
+        # parts are pushed in reverse so they come off in document order
+        stack = list(reversed(message['payload'].get('parts', ())))
+        while stack:
+            part = stack.pop()
+            filename = part.get('filename')
+            if filename:
+                body = part['body']
+                append({
+                    'id': body.get('attachmentId', ''),
+                    'filename': filename,
+                    'mimeType': part['mimeType'],
+                    'size': body.get('size', 0)
+                })
+            
+            subparts = part.get('parts')
+            if subparts:
+                stack.extend(reversed(subparts))
         
         return attachments
     
@@ -253,9 +914,13 @@ class GmailAPIAuthenticator(EmailAuthenticator):
             attachment = self.service.users().messages().attachments().get(
                 userId='me', messageId=message_id, id=attachment_id).execute()
             
-            file_data = base64.urlsafe_b64decode(attachment['data'])
+            # Release the base64 text as soon as it is decoded, so a large
+            # attachment is not held in memory twice while it is written
+            file_data = urlsafe_b64decode(attachment.pop('data'))
+            del attachment
             
-            with open(destination, 'wb') as f:
+            # Unbuffered, so the payload goes to the file without another copy
+            with open(destination, 'wb', buffering=0) as f:
                 f.write(file_data)
             
             return True
@@ -265,9 +930,90 @@ class GmailAPIAuthenticator(EmailAuthenticator):
             return False
 
 
+class _DeflateIMAP4_SSL(imaplib.IMAP4_SSL):
+    """IMAP4_SSL connection that can switch to COMPRESS=DEFLATE (RFC 4978)"""
+    
+    _compressor = None
+    _decompressor = None
+    
+    def enable_compression(self) -> bool:
+        """
+        Compress the rest of the session if the server supports it
+        
+        Returns:
+            bool: True if compression was enabled, False otherwise
+        """
+        # Servers often only advertise COMPRESS once logged in
+        typ, data = self.capability()
+        if typ != 'OK' or b'COMPRESS=DEFLATE' not in data[-1].upper().split():
+            return False
+        
+        typ, _ = self.xatom('COMPRESS', 'DEFLATE')
+        if typ != 'OK':
+            return False
+        
+        # Raw deflate streams, without zlib headers, in both directions
+        self._compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        self._decompressor = zlib.decompressobj(-15)
+        self._inbuf = bytearray()
+        return True
+    
+    def read(self, size: int) -> bytes:
+        """Read 'size' bytes from remote"""
+        if self._decompressor is None:
+            return super().read(size)
+        
+        while len(self._inbuf) < size:
+            self._fill()
+        data = bytes(self._inbuf[:size])
+        del self._inbuf[:size]
+        return data
+    
+    def readline(self) -> bytes:
+        """Read line from remote"""
+        if self._decompressor is None:
+            return super().readline()
+        
+        while True:
+            end = self._inbuf.find(b'\n') + 1
+            if end:
+                break
+            if len(self._inbuf) > imaplib._MAXLINE:
+                raise self.error(f"got more than {imaplib._MAXLINE} bytes")
+            self._fill()
+        line = bytes(self._inbuf[:end])
+        del self._inbuf[:end]
+        return line
+    
+    def send(self, data: bytes) -> None:
+        """Send data to remote"""
+        if self._compressor is not None:
+            data = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        super().send(data)
+    
+    def _fill(self) -> None:
+        """Read and decompress the next chunk from the socket"""
+        chunk = self.file.read1(65536)
+        if not chunk:
+            raise self.abort('socket error: EOF')
+        self._inbuf += self._decompressor.decompress(chunk)
+
+
 class IMAPAuthenticator(EmailAuthenticator):
     """IMAP authenticator for accessing email accounts via IMAP protocol"""
     
+    # Logged-in connections shared across instances, keyed by (server, port,
+    # email address, password fingerprint), with a lock and keepalive timer
+    # for each; the fingerprint means only the right password reuses one
+    _POOL: Dict[Tuple[str, int, str, bytes], 'imaplib.IMAP4_SSL'] = {}
+    _POOL_LOCKS: Dict[Tuple[str, int, str, bytes], 'threading.RLock'] = {}
+    _POOL_TIMERS: Dict[Tuple[str, int, str, bytes], 'threading.Timer'] = {}
+    _POOL_LOCK = threading.Lock()
+    
+    # Per-process HMAC key for password fingerprints, so pool keys do not
+    # hold a plain hash of anyone's password
+    _POOL_SECRET = os.urandom(32)
+    
     def __init__(self, email_address: str = None, password: str = None, 
                  imap_server: str = None, imap_port: int = 993):
         """
@@ -285,6 +1031,7 @@ class IMAPAuthenticator(EmailAuthenticator):
         self.imap_server = imap_server
         self.imap_port = imap_port
         self.connection = None
+        self._conn_lock = threading.RLock()
     
     def authenticate(self) -> bool:
         """
@@ -298,28 +1045,49 @@ class IMAPAuthenticator(EmailAuthenticator):
             if not self.email_address:
                 self.email_address = input("Enter email address: ")
             
+            # If server not provided, try to guess from email domain
+            if not self.imap_server:
+                domain = self.email_address.split('@')[-1].lower()
+                self.imap_server = (IMAP_SERVERS.get(domain) or
+                                    input(f"Enter IMAP server for {domain}: "))
+            
             # If password not provided, prompt user securely
             if not self.password:
                 self.password = getpass.getpass(f"Enter password for {self.email_address}: ")
             
-            # If server not provided, try to guess from email domain
-            if not self.imap_server:
-                domain = self.email_address.split('@')[-1]
-                if domain == 'gmail.com':
-                    self.imap_server = 'imap.gmail.com'
-                elif domain == 'outlook.com' or domain == 'hotmail.com':
-                    self.imap_server = 'outlook.office365.com'
-                elif domain == 'yahoo.com':
-                    self.imap_server = 'imap.mail.yahoo.com'
-                else:
-                    self.imap_server = input(f"Enter IMAP server for {domain}: ")
+            key = self._pool_key()
             
-            # Connect to the IMAP server
-            self.connection = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+            # Reuse a pooled connection if the server still answers on it
+            with self._POOL_LOCK:
+                lock = self._POOL_LOCKS.setdefault(key, threading.RLock())
             
-            # Login to the server
-            self.connection.login(self.email_address, self.password)
+            with lock:
+                connection = self._POOL.get(key)
+                if connection is not None:
+                    try:
+                        if connection.noop()[0] == 'OK':
+                            self.connection = connection
+                            self._conn_lock = lock
+                            self.authenticated = True
+                            return True
+                    except (imaplib.IMAP4.error, OSError):
+                        pass
+                    self._drop_pooled(key)
+                
+                # Connect to the IMAP server
+                connection = _DeflateIMAP4_SSL(self.imap_server, self.imap_port)
+                
+                # Login to the server
+                connection.login(self.email_address, self.password)
+                
+                # Compress the session when the server allows it
+                connection.enable_compression()
+                
+                self._POOL[key] = connection
+                self._schedule_keepalive(key)
             
+            self.connection = connection
+            self._conn_lock = lock
             self.authenticated = True
             return True
             
@@ -327,23 +1095,72 @@ class IMAPAuthenticator(EmailAuthenticator):
             print(f"IMAP authentication failed: {str(e)}")
             return False
     
-    def disconnect(self) -> None:
-        """Disconnect from IMAP server"""
-        if self.connection:
-            try:
-                self.connection.logout()
-            except:
-                pass
-            self.connection = None
+    def disconnect(self, force: bool = False) -> None:
+        """
+        Disconnect from IMAP server
+        
+        Args:
+            force: Log out and close the pooled connection, instead of
+                leaving it open for the next authenticate()
+        """
+        if self.connection and force:
+            with self._conn_lock:
+                self._drop_pooled(self._pool_key())
+                try:
+                    self.connection.logout()
+                except:
+                    pass
+        self.connection = None
         self.authenticated = False
     
-    def fetch_emails(self, query: str = "ALL", max_emails: int = 100) -> List[Dict]:
+    def _pool_key(self) -> Tuple[str, int, str, bytes]:
+        """Get the connection pool key for this account and password"""
+        fingerprint = hmac.new(self._POOL_SECRET, self.password.encode(), 'sha256').digest()
+        return (self.imap_server, self.imap_port, self.email_address, fingerprint)
+    
+    @classmethod
+    def _drop_pooled(cls, key: Tuple[str, int, str, bytes]) -> None:
+        """Remove a connection from the pool and stop its keepalive timer"""
+        cls._POOL.pop(key, None)
+        timer = cls._POOL_TIMERS.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+    
+    @classmethod
+    def _schedule_keepalive(cls, key: Tuple[str, int, str, bytes]) -> None:
+        """Send a NOOP on a pooled connection after IMAP_KEEPALIVE_INTERVAL"""
+        timer = threading.Timer(IMAP_KEEPALIVE_INTERVAL, cls._keepalive, args=(key,))
+        timer.daemon = True
+        cls._POOL_TIMERS[key] = timer
+        timer.start()
+    
+    @classmethod
+    def _keepalive(cls, key: Tuple[str, int, str, bytes]) -> None:
+        """Keep a pooled connection alive, dropping it if the server has gone away"""
+        with cls._POOL_LOCKS[key]:
+            connection = cls._POOL.get(key)
+            if connection is None:
+                return
+            
+            try:
+                connection.noop()
+            except (imaplib.IMAP4.error, OSError):
+                cls._drop_pooled(key)
+                return
+            
+            cls._schedule_keepalive(key)
+    
+    def fetch_emails(self, query: str = "ALL", max_emails: int = 100,
+                     lazy: bool = True) -> List[Dict]:
         """
         Fetch emails from IMAP server
         
         Args:
             query: IMAP search criteria (e.g., 'SUBJECT "receipt"')
             max_emails: Maximum number of emails to fetch
+            lazy: Fetch only headers and the MIME structure; bodies and
+                attachments are left on the server until fetch_body() or
+                download_attachment() is called
             
         Returns:
             List of email dictionaries with metadata and content
@@ -351,136 +1168,395 @@ class IMAPAuthenticator(EmailAuthenticator):
         if not self.is_authenticated():
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
+        for attempt in range(2):
+            try:
+                # The connection may be shared, so hold it for the whole exchange
+                with self._conn_lock:
+                    return self._search_and_fetch(query, max_emails, lazy)
+                
+            except imaplib.IMAP4.abort as e:
+                # The server dropped the pooled connection; reconnect once
+                with self._conn_lock:
+                    self._drop_pooled(self._pool_key())
+                self.connection = None
+                self.authenticated = False
+                
+                if attempt or not self.authenticate():
+                    print(f"Error fetching emails: {str(e)}")
+                    return []
+                
+            except Exception as e:
+                print(f"Error fetching emails: {str(e)}")
+                return []
+    
+    def _search_and_fetch(self, query: str, max_emails: int, lazy: bool) -> List[Dict]:
+        """Search the inbox and fetch and parse the matching emails"""
+        # Select the mailbox (inbox by default)
+        self.connection.select('INBOX')
+        
+        # Search by UID, which stays stable if messages are expunged mid-session
+        status, data = self.connection.uid('SEARCH', None, query)
+        
+        if status != 'OK':
+            print(f"Search failed: {status}")
+            return []
+        
+        # Get message UIDs
+        message_ids = data[0].split()
+        
+        # Limit to max_emails
+        if len(message_ids) > max_emails:
+            message_ids = message_ids[:max_emails]
+        
+        if lazy:
+            fetched = self._uid_fetch(message_ids, IMAP_HEADER_FETCH)
+            return [self._parse_email_headers(msg_id, *fetched[msg_id])
+                    for msg_id in message_ids if msg_id in fetched]
+        
+        return [self._parse_email(msg_id, raw_email)
+                for msg_id, raw_email in self._fetch_raw_emails(message_ids)]
+    
+    def fetch_body(self, uid: str) -> str:
+        """
+        Fetch the body of an email listed with lazy=True
+        
+        Args:
+            uid: IMAP message UID (the email dictionary's 'id')
+            
+        Returns:
+            str: Body text, or "" if the message could not be fetched
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        try:
+            with self._conn_lock:
+                raw_emails = self._fetch_raw_emails([uid.encode()])
+        except Exception as e:
+            print(f"Error fetching email body: {str(e)}")
+            return ""
+        
+        if not raw_emails:
+            return ""
+        
+        return self._parse_email(*raw_emails[0])['body']
+    
+    def fetch_attachment(self, uid: str, section: str,
+                         encoding: Optional[str] = None) -> Optional[bytes]:
+        """
+        Fetch and decode a single MIME part of an email
+        
+        Args:
+            uid: IMAP message UID (the email dictionary's 'id')
+            section: IMAP body section of the part, e.g. '2' or '1.3'
+            encoding: Content-Transfer-Encoding of the part
+            
+        Returns:
+            bytes: Decoded part, or None if it could not be fetched
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
         try:
-            # Select the mailbox (inbox by default)
-            self.connection.select('INBOX')
+            with self._conn_lock:
+                fetched = self._uid_fetch([uid.encode()], f'(BODY.PEEK[{section}])')
+        except Exception as e:
+            print(f"Error fetching attachment: {str(e)}")
+            return None
+        
+        if not fetched:
+            return None
+        
+        payload = next(iter(fetched.values()))[1]
+        encoding = (encoding or '').lower()
+        if encoding == 'base64':
+            return binascii.a2b_base64(payload)
+        if encoding == 'quoted-printable':
+            return quopri.decodestring(payload)
+        return payload
+    
+    def _parse_email(self, msg_id: bytes, raw_email: bytes) -> Dict:
+        """Parse a raw email, with fast_mail_parser when it is available"""
+        email_data = None
+        
+        if FAST_MAIL_PARSER_AVAILABLE:
+            email_data = self._parse_email_fast(msg_id, raw_email)
+        
+        if email_data is None:
+            email_data = self._parse_email_stdlib(msg_id, raw_email)
+        
+        return email_data
+    
+    def _uid_fetch(self, message_ids: List[bytes], items: str) -> Dict[bytes, Tuple[bytes, bytes]]:
+        """
+        Run one UID FETCH command per IMAP_FETCH_CHUNK messages
+        
+        Args:
+            message_ids: IMAP message UIDs
+            items: FETCH data items, e.g. '(BODY.PEEK[])'
             
-            # Search for messages matching criteria
-            status, data = self.connection.search(None, query)
+        Returns:
+            Dictionary mapping each UID to (response line, literal)
+        """
+        results = {}
+        
+        for start in range(0, len(message_ids), IMAP_FETCH_CHUNK):
+            chunk = message_ids[start:start + IMAP_FETCH_CHUNK]
+            status, data = self.connection.uid('FETCH', b','.join(chunk), items)
             
             if status != 'OK':
-                print(f"Search failed: {status}")
-                return []
+                print(f"Fetch failed: {status}")
+                continue
             
-            # Get message IDs
-            message_ids = data[0].split()
+            # Each message arrives as a (b'N (UID U ... {size}', literal) tuple,
+            # followed by the rest of its line, e.g. b')'; N is the sequence
+            # number, not the UID. Some servers send items such as the UID after
+            # the literal instead, as b' UID U)'
+            line = literal = None
+            for item in data + [None]:
+                if isinstance(item, tuple) or item is None:
+                    if literal is not None:
+                        match = _IMAP_UID_RE.search(line)
+                        if match:
+                            results[match.group(1)] = (line, literal)
+                    if item is None:
+                        break
+                    line, literal = item
+                elif literal is not None:
+                    line += b' ' + item
+        
+        return results
+    
+    def _fetch_raw_emails(self, message_ids: List[bytes]) -> List[Tuple[bytes, bytes]]:
+        """
+        Fetch raw messages
+        
+        BODY.PEEK[] is used instead of RFC822 so fetching does not mark the
+        messages as \\Seen on the server.
+        
+        Args:
+            message_ids: IMAP message UIDs
             
-            # Limit to max_emails
-            if len(message_ids) > max_emails:
-                message_ids = message_ids[:max_emails]
+        Returns:
+            List of (message UID, raw message) pairs, in message_ids order
+        """
+        fetched = self._uid_fetch(message_ids, '(BODY.PEEK[])')
+        return [(msg_id, fetched[msg_id][1]) for msg_id in message_ids if msg_id in fetched]
+    
+    def _parse_email_headers(self, msg_id: bytes, line: bytes, headers: bytes) -> Dict:
+        """
+        Build an email dictionary from a lazy listing's headers and BODYSTRUCTURE
+        
+        The body is left empty and 'raw_message' is None. Attachments carry the
+        IMAP section and encoding needed to fetch them, and their 'size' is the
+        encoded size reported by the server.
+        """
+        # Stop at the blank line; headers come back already decoded
+        msg = _HEADER_PARSER.parsebytes(headers, headersonly=True)
+        
+        attachments = []
+        start = line.find(b'BODYSTRUCTURE (')
+        if start != -1:
+            try:
+                structure = _parse_imap_list(line, start + len(b'BODYSTRUCTURE '))[0]
+                attachments = self._get_attachments_from_structure(msg_id, structure)
+            except (ValueError, IndexError):
+                # e.g. a structure containing literals; list it without attachments
+                pass
+        
+        return {
+            'id': msg_id.decode(),
+            'subject': str(msg['Subject'] or ''),
+            'from': str(msg['From'] or ''),
+            'to': str(msg['To'] or ''),
+            'date': str(msg['Date']) if msg['Date'] is not None else None,
+            'body': "",
+            'attachments': attachments,
+            'raw_message': None
+        }
+    
+    def _get_attachments_from_structure(self, msg_id: bytes, structure: List) -> List[Dict]:
+        """Extract attachment metadata from a parsed BODYSTRUCTURE"""
+        attachments = []
+        
+        # Depth-first in document order; multipart children are numbered from 1
+        # and a single-part message's body is section 1
+        stack = [(structure, '')]
+        while stack:
+            part, section = stack.pop()
             
-            email_list = []
+            if isinstance(part[0], list):
+                # Child parts come first, followed by the subtype string
+                children = []
+                for child in part:
+                    if not isinstance(child, list):
+                        break
+                    children.append(child)
+                for index in range(len(children), 0, -1):
+                    stack.append((children[index - 1],
+                                  f"{section}.{index}" if section else str(index)))
+                continue
             
-            for msg_id in message_ids:
-                # Fetch the message
-                status, data = self.connection.fetch(msg_id, '(RFC822)')
-                
-                if status != 'OK':
-                    continue
-                
-                # Parse the email
-                raw_email = data[0][1]
-                msg = email.message_from_bytes(raw_email)
-                
-                # Extract headers
-                subject = self._decode_header(msg['Subject'])
-                from_addr = self._decode_header(msg['From'])
-                to_addr = self._decode_header(msg['To'])
-                date = msg['Date']
-                
-                # Extract body
-                body = self._get_body_from_message(msg)
-                
-                # Extract attachments
-                attachments = self._get_attachments_from_message(msg)
-                
-                email_data = {
-                    'id': msg_id.decode(),
-                    'subject': subject,
-                    'from': from_addr,
-                    'to': to_addr,
-                    'date': date,
-                    'body': body,
-                    'attachments': attachments,
-                    'raw_message': msg
-                }
-                
-                email_list.append(email_data)
+            # Extension data starts after the basic fields, plus the line
+            # count for text parts or envelope, body and line count for messages
+            mime_type = f"{part[0]}/{part[1]}".lower()
+            if mime_type == 'message/rfc822':
+                extension = 10
+            elif mime_type.startswith('text/'):
+                extension = 8
+            else:
+                extension = 7
             
-            return email_list
+            disposition = part[extension + 1] if len(part) > extension + 1 else None
+            if not isinstance(disposition, list) or str(disposition[0]).lower() != 'attachment':
+                continue
             
-        except Exception as e:
-            print(f"Error fetching emails: {str(e)}")
-            return []
+            filename = (_imap_params(disposition[1] if len(disposition) > 1 else None).get('filename') or
+                        _imap_params(part[2]).get('name'))
+            if filename:
+                attachments.append({
+                    'filename': self._decode_header(filename),
+                    'content_type': mime_type,
+                    'size': int(part[6] or 0),
+                    'uid': msg_id.decode(),
+                    'section': section or '1',
+                    'encoding': part[5]
+                })
+        
+        return attachments
+    
+    def _parse_email_fast(self, msg_id: bytes, raw_email: bytes) -> Optional[Dict]:
+        """
+        Parse a raw email with fast_mail_parser
+        
+        Headers come back already decoded. The parsed message object is not
+        kept, so 'raw_message' is None and attachments carry their payload.
+        
+        Returns:
+            Email dictionary, or None if the email could not be parsed
+        """
+        try:
+            parsed = parse_email(raw_email)
+        except ParseError:
+            return None
+        
+        # Header values are lists in newer releases and strings in older ones
+        headers = {}
+        for name, value in parsed.headers.items():
+            if isinstance(value, list):
+                value = value[0] if value else ''
+            headers.setdefault(name.lower(), value)
+        
+        if parsed.text_plain:
+            body = parsed.text_plain[0]
+        elif parsed.text_html:
+            body = parsed.text_html[0]
+        else:
+            body = ""
+        
+        attachments = [
+            {
+                'filename': attachment.filename,
+                'content_type': attachment.mimetype,
+                'size': len(attachment.content),
+                'payload': attachment.content
+            }
+            for attachment in parsed.attachments if attachment.filename
+        ]
+        
+        return {
+            'id': msg_id.decode(),
+            'subject': parsed.subject or headers.get('subject', ''),
+            'from': headers.get('from', ''),
+            'to': headers.get('to', ''),
+            'date': headers.get('date'),
+            'body': body,
+            'attachments': attachments,
+            'raw_message': None
+        }
+    
+    def _parse_email_stdlib(self, msg_id: bytes, raw_email: bytes) -> Dict:
+        """Parse a raw email with the standard library email package"""
+        msg = email.message_from_bytes(raw_email)
+        
+        # Extract headers
+        subject = self._decode_header(msg['Subject'])
+        from_addr = self._decode_header(msg['From'])
+        to_addr = self._decode_header(msg['To'])
+        date = msg['Date']
+        
+        # Extract body
+        body = self._get_body_from_message(msg)
+        
+        # Extract attachments
+        attachments = self._get_attachments_from_message(msg)
+        
+        return {
+            'id': msg_id.decode(),
+            'subject': subject,
+            'from': from_addr,
+            'to': to_addr,
+            'date': date,
+            'body': body,
+            'attachments': attachments,
+            'raw_message': msg
+        }
     
     def _decode_header(self, header: str) -> str:
         """Decode email header"""
         if header is None:
             return ""
-            
-        decoded_header = decode_header(header)
-        header_parts = []
         
-        for content, encoding in decoded_header:
-            if isinstance(content, bytes):
-                if encoding:
-                    header_parts.append(content.decode(encoding))
-                else:
-                    try:
-                        header_parts.append(content.decode('utf-8'))
-                    except UnicodeDecodeError:
-                        header_parts.append(content.decode('latin-1'))
-            else:
-                header_parts.append(content)
+        header = str(header)
+        if '=?' not in header:
+            return header
         
-        return " ".join(header_parts)
+        # One regex pass decodes every encoded word in place
+        header = _ENCODED_WORD_GAP_RE.sub('', header)
+        return _ENCODED_WORD_RE.sub(_decode_encoded_word, header)
     
     def _get_body_from_message(self, msg) -> str:
         """Extract body text from an email message"""
-        if msg.is_multipart():
-            # If the message has multiple parts, find the text/plain part
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-                
-                # Skip attachments
-                if "attachment" in content_disposition:
-                    continue
-                
-                # Get the body text
-                if content_type == "text/plain":
-                    try:
-                        body = part.get_payload(decode=True).decode()
-                        return body
-                    except:
-                        pass
-            
-            # If no text/plain part found, try to get the first part
-            for part in msg.walk():
-                content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
-                
-                # Skip attachments
-                if "attachment" in content_disposition:
-                    continue
-                
-                # Get the body text
-                if content_type == "text/html":
-                    try:
-                        body = part.get_payload(decode=True).decode()
-                        return body
-                    except:
-                        pass
-        else:
+        if not msg.is_multipart():
             # If the message is not multipart, just get the payload
-            try:
-                body = msg.get_payload(decode=True).decode()
-                return body
-            except:
-                pass
+            return self._decode_part_text(msg) or ""
+        
+        # One walk: the first text/plain part wins, otherwise the first
+        # text/html part is decoded once the walk is over
+        html_part = None
+        for part in msg.walk():
+            content_type = part.get_content_type()
+            if content_type not in ("text/plain", "text/html"):
+                continue
+            
+            # Skip attachments
+            if "attachment" in str(part.get("Content-Disposition")):
+                continue
+            
+            if content_type == "text/plain":
+                body = self._decode_part_text(part)
+                if body is not None:
+                    return body
+            elif html_part is None:
+                html_part = part
+        
+        if html_part is not None:
+            return self._decode_part_text(html_part) or ""
         
         return ""
     
+    def _decode_part_text(self, part) -> Optional[str]:
+        """Decode a MIME part's payload with its declared charset, or None if it has none"""
+        payload = part.get_payload(decode=True)
+        if payload is None:
+            return None
+        
+        try:
+            return payload.decode(part.get_content_charset() or 'utf-8', 'replace')
+        except LookupError:
+            # Unknown charset
+            return payload.decode('utf-8', 'replace')
+    
     def _get_attachments_from_message(self, msg) -> List[Dict]:
         """Extract attachments from an email message"""
         attachments = []
@@ -494,11 +1570,14 @@ class IMAPAuthenticator(EmailAuthenticator):
                     filename = part.get_filename()
                     
                     if filename:
+                        # Decode once and keep the bytes, so the size and a later
+                        # download do not each decode the part again
+                        payload = part.get_payload(decode=True) or b''
                         attachment = {
                             'filename': filename,
                             'content_type': part.get_content_type(),
-                            'size': len(part.get_payload(decode=True)),
-                            'part': part
+                            'size': len(payload),
+                            'payload': payload
                         }
                         attachments.append(attachment)
         
@@ -516,15 +1595,24 @@ class IMAPAuthenticator(EmailAuthenticator):
             bool: True if download successful, False otherwise
         """
         try:
-            if 'part' in attachment:
+            if 'payload' in attachment:
+                payload = attachment['payload']
+            elif 'part' in attachment:
                 payload = attachment['part'].get_payload(decode=True)
-                
-                with open(destination, 'wb') as f:
-                    f.write(payload)
-                
-                return True
+            elif 'section' in attachment:
+                # Listed lazily; fetch just this part from the server
+                payload = self.fetch_attachment(attachment['uid'], attachment['section'],
+                                                attachment.get('encoding'))
+                if payload is None:
+                    return False
+            else:
+                return False
             
-            return False
+            # Unbuffered, so the payload goes to the file without another copy
+            with open(destination, 'wb', buffering=0) as f:
+                f.write(payload)
+            
+            return True
             
         except Exception as e:
             print(f"Error downloading attachment: {str(e)}")
@@ -549,46 +1637,3 @@ def create_authenticator(auth_type: str = 'gmail_api', **kwargs) -> EmailAuthent
     else:
         raise ValueError(f"Unknown authenticator type: {auth_type}")
 
-
-if __name__ == "__main__":
-    # Example usage
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='Email Authentication Test')
-    parser.add_argument('--type', choices=['gmail_api', 'imap'], default='gmail_api',
-                        help='Authentication type (gmail_api or imap)')
-    parser.add_argument('--email', help='Email address (for IMAP)')
-    parser.add_argument('--password', help='Email password (for IMAP)')
-    parser.add_argument('--server', help='IMAP server (for IMAP)')
-    parser.add_argument('--credentials', default='credentials.json',
-                        help='Path to credentials.json file (for Gmail API)')
-    parser.add_argument('--query', default='SUBJECT "receipt"',
-                        help='Search query for emails')
-    parser.add_argument('--max', type=int, default=10,
-                        help='Maximum number of emails to fetch')
-    
-    args = parser.parse_args()
-    
-    if args.type == 'gmail_api':
-        auth = create_authenticator('gmail_api', credentials_file=args.credentials)
-    else:
-        auth = create_authenticator('imap', email_address=args.email,
-                                   password=args.password, imap_server=args.server)
-    
-    if auth.authenticate():
-        print("Authentication successful!")
-        
-        emails = auth.fetch_emails(query=args.query, max_emails=args.max)
-        
-        print(f"Found {len(emails)} emails matching query: {args.query}")
-        
-        for i, email_data in enumerate(emails):
-            print(f"\nEmail {i+1}:")
-            print(f"Subject: {email_data['subject']}")
-            print(f"From: {email_data['from']}")
-            print(f"Date: {email_data['date']}")
-            print(f"Attachments: {len(email_data['attachments'])}")
-        
-        auth.disconnect()
-    else:
-        print("Authentication failed.")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Email Authentication Test CLI for Receipt Scraper
+
+This script authenticates with an email account using the email_auth module
+and lists the emails matching a search query.
+"""
+
+import os
+import sys
+import argparse
+
+# Add the project root to the path so the src package can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.email_auth import create_authenticator
+
+def main() -> None:
+    """Authenticate and list matching emails"""
+    parser = argparse.ArgumentParser(description='Email Authentication Test')
+    parser.add_argument('--type', choices=['gmail_api', 'imap'], default='gmail_api',
+                        help='Authentication type (gmail_api or imap)')
+    parser.add_argument('--email', help='Email address (for IMAP)')
+    parser.add_argument('--password', help='Email password (for IMAP)')
+    parser.add_argument('--server', help='IMAP server (for IMAP)')
+    parser.add_argument('--credentials', default='credentials.json',
+                        help='Path to credentials.json file (for Gmail API)')
+    parser.add_argument('--query', default='SUBJECT "receipt"',
+                        help='Search query for emails')
+    parser.add_argument('--max', type=int, default=10,
+                        help='Maximum number of emails to fetch')
+
+    args = parser.parse_args()
+
+    if args.type == 'gmail_api':
+        auth = create_authenticator('gmail_api', credentials_file=args.credentials)
+    else:
+        auth = create_authenticator('imap', email_address=args.email,
+                                   password=args.password, imap_server=args.server)
+
+    if auth.authenticate():
+        print("Authentication successful!")
+
+        emails = auth.fetch_emails(query=args.query, max_emails=args.max)
+
+        print(f"Found {len(emails)} emails matching query: {args.query}")
+
+        for i, email_data in enumerate(emails):
+            print(f"\nEmail {i+1}:")
+            print(f"Subject: {email_data['subject']}")
+            print(f"From: {email_data['from']}")
+            print(f"Date: {email_data['date']}")
+            print(f"Attachments: {len(email_data['attachments'])}")
+
+        auth.disconnect()
+    else:
+        print("Authentication failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Parser Cache Module for Email Receipt Scraper
+
+This module provides a persistent on-disk cache of receipt parser results,
+so emails that were already parsed on a previous run are not parsed again.
+"""
+
+import os
+import json
+import sqlite3
+from typing import Dict, List, Optional
+
+class ParserCache:
+    """SQLite-backed cache of receipt parser results keyed by message ID"""
+    
+    def __init__(self, cache_file: str, version: int):
+        """
+        Initialize the parser cache
+        
+        Args:
+            cache_file: Path to the SQLite database file
+            version: Parser version; entries stored with another version are ignored
+        """
+        self.cache_file = cache_file
+        self.version = version
+        self.conn = None
+    
+    def open(self) -> bool:
+        """
+        Open (and create if needed) the cache database
+        
+        Returns:
+            bool: True if the cache was opened successfully, False otherwise
+        """
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            
+            self.conn = sqlite3.connect(self.cache_file)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS parser_cache "
+                "(msg_id TEXT PRIMARY KEY, version INT, data BLOB)"
+            )
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error opening parser cache: {str(e)}")
+            self.conn = None
+            return False
+    
+    def close(self) -> None:
+        """Commit pending writes and close the cache database"""
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+    
+    def get_many(self, msg_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Look up cached parser results
+        
+        Args:
+            msg_ids: Message IDs to look up
+        
+        Returns:
+            Dict: Parser result (None if parsing failed) for each cache hit,
+                keyed by message ID; misses and stale versions are left out
+        """
+        hits = {}
+        if self.conn is None or not msg_ids:
+            return hits
+        
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(msg_ids), 500):
+            chunk = msg_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT msg_id, data FROM parser_cache "
+                f"WHERE version = ? AND msg_id IN ({placeholders})",
+                [self.version] + chunk
+            )
+            for msg_id, data in rows:
+                hits[msg_id] = json.loads(data)
+        
+        return hits
+    
+    def put_many(self, results: Dict[str, Optional[Dict]]) -> None:
+        """
+        Store parser results
+        
+        Args:
+            results: Parser result (None if parsing failed) keyed by message ID
+        """
+        if self.conn is None or not results:
+            return
+        
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO parser_cache (msg_id, version, data) VALUES (?, ?, ?)",
+            [(msg_id, self.version, json.dumps(data, default=str))
+             for msg_id, data in results.items()]
+        )
+        self.conn.commit()
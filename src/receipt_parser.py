@@ -6,19 +6,198 @@ This module provides functionality for parsing receipt data from email content,
 extracting relevant information such as vendor, date, total amount, and items.
 """
 
+import os
 import re
 import json
 import datetime
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Any, Union
 from bs4 import BeautifulSoup
 import dateutil.parser
 
+# Fast HTML parser imports
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+# Multi-pattern matching imports
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Fast JSON imports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Version of the parser output; bump it whenever parse() results change so
+# cached results from older versions are re-parsed
+PARSER_VERSION = 3
+
+# Most items extracted from one receipt; bounds the work on bodies that are
+# long lists of prices, such as catalogue or newsletter emails
+MAX_ITEMS = 200
+
+# Fields counted by the confidence score: required ones weigh 0.7 in total,
+# optional ones 0.3, and the score for each pair of counts is computed once
+_REQUIRED_FIELDS = itemgetter('vendor', 'date', 'total')
+_OPTIONAL_FIELDS = itemgetter('subtotal', 'tax', 'shipping', 'discount', 'order_number')
+_CONFIDENCE_SCORES = [[required / 3 * 0.7 + optional / 5 * 0.3 for optional in range(6)]
+                      for required in range(4)]
+
+# Month names and abbreviations dateutil recognises
+_MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'oct': 10, 'october': 10, 'nov': 11, 'november': 11, 'dec': 12, 'december': 12,
+}
+
+# Unambiguous date layouts read without dateutil: (pattern, group holding
+# the year, the month and the day); two-digit or zero-padded years and
+# anything else are left to dateutil, whose century and day-first rules
+# these would not match
+_DATE_LAYOUTS = [
+    (re.compile(r'([0-9]{1,2})([/-])([0-9]{1,2})\2([1-9][0-9]{3})'), 4, 1, 3),
+    (re.compile(r'([1-9][0-9]{3})([/-])([0-9]{1,2})\2([0-9]{1,2})'), 1, 3, 4),
+    (re.compile(r'([A-Za-z]{3,9})\.?\s+([0-9]{1,2}),?\s+([1-9][0-9]{3})'), 3, 1, 2),
+    (re.compile(r'([0-9]{1,2})\s+([A-Za-z]{3,9})\.?\s+([1-9][0-9]{3})'), 3, 2, 1),
+    (re.compile(r'([1-9][0-9]{3})\s+([A-Za-z]{3,9})\.?\s+([0-9]{1,2})'), 1, 2, 3),
+]
+
+def _parse_date(text: str) -> datetime.datetime:
+    """
+    Parse a receipt date, skipping dateutil's format guessing when the
+    layout is unambiguous
+    
+    Args:
+        text: Date as found in the receipt
+        
+    Returns:
+        datetime: Parsed date
+        
+    Raises:
+        ValueError: If the text is not a date dateutil can parse either
+    """
+    for pattern, year, month, day in _DATE_LAYOUTS:
+        match = pattern.fullmatch(text)
+        if match:
+            month_text = match.group(month)
+            month_number = int(month_text) if month_text.isdigit() else _MONTHS.get(month_text.lower())
+            if month_number:
+                try:
+                    return datetime.datetime(int(match.group(year)), month_number,
+                                             int(match.group(day)))
+                except ValueError:
+                    pass
+            break
+    
+    return dateutil.parser.parse(text)
+
+# Run of the characters item names, quantities and the start of prices are
+# made of; an item match lies inside one such run and continues into the
+# price right after it, so only runs followed by the '.' of a price or the
+# '$' before one can contain an item
+_ITEM_RUN_RE = re.compile(r'[\w\s\-&\']+')
+_ITEM_PRICE_TAIL_RE = re.compile(r'(?<=\d)\.\d{2}|(?<=\s)\$\d')
+
+def _iter_item_matches(pattern: re.Pattern, body: str):
+    """
+    Iterate over the matches of an item pattern, like finditer, but skip
+    runs that cannot contain an item instead of backtracking through them
+    
+    Args:
+        pattern: Compiled item pattern
+        body: Receipt text
+        
+    Yields:
+        re.Match: Matches in the order finditer would produce them
+    """
+    pos = 0
+    while True:
+        run = _ITEM_RUN_RE.search(body, pos)
+        if run is None:
+            return
+        
+        if not _ITEM_PRICE_TAIL_RE.match(body, run.end()):
+            pos = run.end()
+            continue
+        
+        match = pattern.search(body, run.start())
+        if match is None:
+            return
+        yield match
+        pos = match.end()
+
+# Batches smaller than this are parsed in-process, since starting worker
+# processes costs more than parsing a handful of emails
+PARSE_BATCH_MIN_EMAILS = 8
+
+# Start of an HTML document or body, in any case; the search allocates
+# nothing, and listing only the all-lower and all-upper spellings instead of
+# IGNORECASE would miss tags like <Html> while saving a microsecond or two
+_HTML_PROBE = re.compile(r'<(?:html|body)', re.IGNORECASE)
+
+# Subject keywords marking a receipt email
+_RECEIPT_KEYWORDS_RE = re.compile(r'receipt|order|purchase|confirmation|invoice')
+
+# Vendors recognised by name in the subject, in order of precedence
+SUBJECT_VENDORS = ['Amazon', 'Walmart', 'Target', 'Starbucks', 'Uber Eats',
+                   'DoorDash', 'Best Buy', 'Home Depot', 'Lowes', 'Costco',
+                   'Sam\'s Club', 'Apple', 'Microsoft', 'eBay', 'Etsy']
+
+# Every vendor name in a subject in one pass; the lookahead lets matches
+# overlap, so a name is never hidden by another that ends inside it
+_SUBJECT_VENDOR_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(vendor.lower()) for vendor in SUBJECT_VENDORS) + '))')
+_SUBJECT_VENDOR_RANK = {vendor.lower(): rank for rank, vendor in enumerate(SUBJECT_VENDORS)}
+
+# Map common sender domains to vendor names, in order of precedence
+DOMAIN_VENDORS = {
+    'amazon.com': 'Amazon',
+    'walmart.com': 'Walmart',
+    'target.com': 'Target',
+    'starbucks.com': 'Starbucks',
+    'uber.com': 'Uber Eats',
+    'doordash.com': 'DoorDash',
+    'bestbuy.com': 'Best Buy',
+    'homedepot.com': 'Home Depot',
+    'lowes.com': 'Lowes',
+    'costco.com': 'Costco',
+    'samsclub.com': 'Sam\'s Club',
+    'apple.com': 'Apple',
+    'microsoft.com': 'Microsoft',
+    'ebay.com': 'eBay',
+    'etsy.com': 'Etsy',
+}
+
+# Automaton finding every vendor domain in a sender domain in one pass
+if AHOCORASICK_AVAILABLE:
+    _DOMAIN_AUTOMATON = ahocorasick.Automaton()
+    for _rank, (_domain, _vendor) in enumerate(DOMAIN_VENDORS.items()):
+        _DOMAIN_AUTOMATON.add_word(_domain, (_rank, _vendor))
+    _DOMAIN_AUTOMATON.make_automaton()
+else:
+    _DOMAIN_AUTOMATON = None
+
 class ReceiptParser:
     """Base class for receipt parsing"""
     
+    # Compiled patterns, shared by all instances: (patterns, prefilters,
+    # vendor patterns, item patterns)
+    _compiled = None
+    
     def __init__(self):
         """Initialize the receipt parser"""
-        self.patterns = {
+        patterns = {
             'total': [
                 r'(?:total|amount|sum)(?:\s+\w+){0,3}?\s*[:]\s*[$€£]?([0-9,]+\.[0-9]{2})',
                 r'(?:total|amount|sum)(?:\s+\w+){0,3}?\s*[$€£]([0-9,]+\.[0-9]{2})',
@@ -74,8 +253,21 @@ class ReceiptParser:
             ],
         }
         
+        # One pattern per amount field that matches wherever any of its
+        # currency variants above can: if it finds nothing the field is
+        # skipped after a single search, and where it matches is the earliest
+        # place the variants need to be searched from
+        amount = r'{}(?:\s+\w+){{0,3}}?\s*(?::\s*)?(?:[$€£]\s*)?[0-9,]+\.[0-9]{{2}}'
+        prefilters = {
+            'total': amount.format(r'(?:total|amount|sum)'),
+            'subtotal': amount.format(r'(?:subtotal|sub-total|sub total)'),
+            'tax': amount.format(r'(?:tax|vat|gst|hst|pst)'),
+            'shipping': amount.format(r'(?:shipping|delivery|freight)'),
+            'discount': amount.format(r'(?:discount|savings|coupon|promo)'),
+        }
+        
         # Vendor-specific patterns for known receipt formats
-        self.vendor_patterns = {
+        vendor_patterns = {
             'amazon': {
                 'vendor': 'Amazon',
                 'total': r'(?:Grand Total|Order Total):\s*\$([0-9,]+\.[0-9]{2})',
@@ -114,6 +306,30 @@ class ReceiptParser:
                 'order_number': r'(?:Order) #:\s*([A-Z0-9\-]+)',
             },
         }
+        
+        # Look for common item patterns
+        # Format: Item name, quantity, price
+        item_patterns = [
+            r'(\d+)\s+x\s+([\w\s\-&\']+)\s+\$?(\d+\.\d{2})',
+            r'([\w\s\-&\']+)\s+\$?(\d+\.\d{2})\s+(?:ea|each)',
+            r'([\w\s\-&\']+)\s+\$?(\d+\.\d{2})',
+        ]
+        
+        # Compile every pattern once, rather than on each search
+        if ReceiptParser._compiled is None:
+            ReceiptParser._compiled = (
+                {field: [re.compile(pattern, re.IGNORECASE) for pattern in field_patterns]
+                 for field, field_patterns in patterns.items()},
+                {field: re.compile(pattern, re.IGNORECASE)
+                 for field, pattern in prefilters.items()},
+                {vendor: {field: value if field == 'vendor' else re.compile(value, re.IGNORECASE)
+                          for field, value in fields.items()}
+                 for vendor, fields in vendor_patterns.items()},
+                [re.compile(pattern) for pattern in item_patterns],
+            )
+        
+        (self.patterns, self.prefilters, self.vendor_patterns,
+         self.item_patterns) = ReceiptParser._compiled
     
     def parse(self, email_data: Dict) -> Dict:
         """
@@ -127,7 +343,7 @@ class ReceiptParser:
         """
         # Extract text from HTML if needed
         body = email_data.get('body', '')
-        if '<html' in body.lower() or '<body' in body.lower():
+        if _HTML_PROBE.search(body):
             body = self._extract_text_from_html(body)
         
         # Initialize receipt data
@@ -167,23 +383,67 @@ class ReceiptParser:
         
         return receipt_data
     
+    def parse_batch(self, emails: List[Dict], workers: Optional[int] = None) -> List[Optional[Dict]]:
+        """
+        Parse receipt data from several emails, spread across processes
+        
+        Args:
+            emails: Email data dictionaries with subject, body, etc.
+            workers: Number of worker processes (default: one per CPU)
+            
+        Returns:
+            List of extracted receipt data in the order of the emails, with
+            None for emails that could not be parsed
+        """
+        if len(emails) < PARSE_BATCH_MIN_EMAILS:
+            return [_parse_safely(self, email_data) for email_data in emails]
+        
+        workers = workers or os.cpu_count() or 1
+        
+        # Large chunks keep inter-process traffic down, but leave a few
+        # chunks per worker so the load stays balanced
+        chunksize = max(1, min(64, len(emails) // (workers * 4)))
+        
+        with self.worker_pool(workers) as executor:
+            return list(executor.map(parse_in_worker, emails, chunksize=chunksize))
+    
+    def worker_pool(self, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """
+        Create a process pool whose workers each hold a copy of this parser
+        
+        Args:
+            workers: Number of worker processes (default: one per CPU)
+            
+        Returns:
+            ProcessPoolExecutor to run parse_in_worker on
+        """
+        return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                   initializer=_init_worker, initargs=(self,))
+    
     def _identify_vendor(self, email_data: Dict) -> Optional[str]:
         """Identify vendor from email data"""
-        # Try to extract from email address
-        from_addr = email_data.get('from', '')
-        subject = email_data.get('subject', '')
+        return self._identify_vendor_cached(email_data.get('from', ''),
+                                            email_data.get('subject', ''))
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _identify_vendor_cached(from_addr: str, subject: str) -> Optional[str]:
+        """
+        Identify vendor from sender and subject, remembering recent answers
+        since receipts from one merchant tend to repeat both
         
-        # Common receipt email patterns
-        receipt_keywords = ['receipt', 'order', 'purchase', 'confirmation', 'invoice']
+        Args:
+            from_addr: Sender address
+            subject: Email subject
+            
+        Returns:
+            str: Vendor name, or None if the email is not a recognised receipt
+        """
+        # Try to extract from email address
+        subject_lower = subject.lower()
         
         # Check if it's a receipt email
-        is_receipt = False
-        for keyword in receipt_keywords:
-            if keyword.lower() in subject.lower():
-                is_receipt = True
-                break
-        
-        if not is_receipt:
+        if not _RECEIPT_KEYWORDS_RE.search(subject_lower):
             return None
         
         # Extract domain from email
@@ -191,35 +451,27 @@ class ReceiptParser:
         if domain_match:
             domain = domain_match.group(1).lower()
             
-            # Map common domains to vendor names
-            domain_to_vendor = {
-                'amazon.com': 'Amazon',
-                'walmart.com': 'Walmart',
-                'target.com': 'Target',
-                'starbucks.com': 'Starbucks',
-                'uber.com': 'Uber Eats',
-                'doordash.com': 'DoorDash',
-                'bestbuy.com': 'Best Buy',
-                'homedepot.com': 'Home Depot',
-                'lowes.com': 'Lowes',
-                'costco.com': 'Costco',
-                'samsclub.com': 'Sam\'s Club',
-                'apple.com': 'Apple',
-                'microsoft.com': 'Microsoft',
-                'ebay.com': 'eBay',
-                'etsy.com': 'Etsy',
-            }
+            # Most senders use the vendor domain itself; no vendor domain
+            # contains another, so an exact hit is also the first listed
+            vendor = DOMAIN_VENDORS.get(domain)
+            if vendor:
+                return vendor
             
-            for d, v in domain_to_vendor.items():
-                if d in domain:
-                    return v
+            # Otherwise look for vendor domains inside it (subdomains, etc.)
+            if _DOMAIN_AUTOMATON is not None:
+                matches = [value for _, value in _DOMAIN_AUTOMATON.iter(domain)]
+                if matches:
+                    return min(matches)[1]
+            else:
+                for d, v in DOMAIN_VENDORS.items():
+                    if d in domain:
+                        return v
         
-        # Try to extract from subject
-        for vendor_name in ['Amazon', 'Walmart', 'Target', 'Starbucks', 'Uber Eats', 
-                           'DoorDash', 'Best Buy', 'Home Depot', 'Lowes', 'Costco', 
-                           'Sam\'s Club', 'Apple', 'Microsoft', 'eBay', 'Etsy']:
-            if vendor_name.lower() in subject.lower():
-                return vendor_name
+        # Try to extract from subject, preferring vendors listed first
+        ranks = [_SUBJECT_VENDOR_RANK[match.group(1)]
+                 for match in _SUBJECT_VENDOR_RE.finditer(subject_lower)]
+        if ranks:
+            return SUBJECT_VENDORS[min(ranks)]
         
         return None
     
@@ -232,7 +484,7 @@ class ReceiptParser:
                 receipt_data[field] = patterns[field]
                 continue
                 
-            match = re.search(pattern, body, re.IGNORECASE)
+            match = pattern.search(body)
             if match:
                 value = match.group(1).strip()
                 
@@ -249,13 +501,26 @@ class ReceiptParser:
     
     def _extract_data_with_patterns(self, body: str, receipt_data: Dict) -> Dict:
         """Extract data using generic patterns"""
+        # Fields are searched one at a time: a single union of every field's
+        # pattern scanned with finditer would let one field's match swallow
+        # another's (e.g. 'total' inside 'subtotal') and change which variant
+        # wins, and the re module cannot use its literal prefix scan on the
+        # overlapping lookahead form, which makes it slower than these searches
         for field, patterns in self.patterns.items():
             # Skip if already extracted by vendor-specific patterns
             if receipt_data.get(field) is not None:
                 continue
+            
+            start = 0
+            prefilter = self.prefilters.get(field)
+            if prefilter is not None:
+                match = prefilter.search(body)
+                if match is None:
+                    continue
+                start = match.start()
                 
             for pattern in patterns:
-                match = re.search(pattern, body, re.IGNORECASE)
+                match = pattern.search(body, start)
                 if match:
                     value = match.group(1).strip()
                     
@@ -272,7 +537,7 @@ class ReceiptParser:
         # Try to parse date if found
         if receipt_data.get('date') and isinstance(receipt_data['date'], str):
             try:
-                parsed_date = dateutil.parser.parse(receipt_data['date'])
+                parsed_date = _parse_date(receipt_data['date'])
                 receipt_data['date'] = parsed_date.strftime('%Y-%m-%d')
             except:
                 pass
@@ -282,14 +547,28 @@ class ReceiptParser:
     def _extract_text_from_html(self, html: str) -> str:
         """Extract text from HTML content"""
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
-            
-            # Get text
-            text = soup.get_text(separator=' ', strip=True)
+            if SELECTOLAX_AVAILABLE:
+                tree = LexborHTMLParser(html)
+                
+                # Remove script and style elements
+                for node in tree.css('script, style'):
+                    node.decompose()
+                
+                # Get text, joining stripped text nodes as get_text(strip=True) does
+                root = tree.root
+                nodes = root.traverse(include_text=True) if root is not None else []
+                text = ' '.join(chunk for chunk in (node.text_content.strip()
+                                                    for node in nodes if node.tag == '-text')
+                                if chunk)
+            else:
+                soup = BeautifulSoup(html, 'html.parser')
+                
+                # Remove script and style elements
+                for script in soup(["script", "style"]):
+                    script.extract()
+                
+                # Get text
+                text = soup.get_text(separator=' ', strip=True)
             
             # Break into lines and remove leading and trailing space
             lines = (line.strip() for line in text.splitlines())
@@ -315,17 +594,12 @@ class ReceiptParser:
         """
         items = []
         
-        # Look for common item patterns
-        # Format: Item name, quantity, price
-        item_patterns = [
-            r'(\d+)\s+x\s+([\w\s\-&\']+)\s+\$?(\d+\.\d{2})',
-            r'([\w\s\-&\']+)\s+\$?(\d+\.\d{2})\s+(?:ea|each)',
-            r'([\w\s\-&\']+)\s+\$?(\d+\.\d{2})',
-        ]
-        
-        for pattern in item_patterns:
-            matches = re.findall(pattern, body)
-            for match in matches:
+        for pattern in self.item_patterns:
+            for found in _iter_item_matches(pattern, body):
+                if len(items) >= MAX_ITEMS:
+                    return items
+                
+                match = found.groups()
                 if len(match) == 3:  # Item with quantity
                     try:
                         quantity = int(match[0])
@@ -357,20 +631,31 @@ class ReceiptParser:
     def _calculate_confidence(self, receipt_data: Dict) -> float:
         """Calculate confidence score for the parsed receipt"""
         # Count how many fields were successfully extracted
-        required_fields = ['vendor', 'date', 'total']
-        optional_fields = ['subtotal', 'tax', 'shipping', 'discount', 'order_number']
-        
-        required_count = sum(1 for field in required_fields if receipt_data.get(field) is not None)
-        optional_count = sum(1 for field in optional_fields if receipt_data.get(field) is not None)
-        
-        # Calculate confidence score
-        required_weight = 0.7
-        optional_weight = 0.3
+        required_count = 3 - _REQUIRED_FIELDS(receipt_data).count(None)
+        optional_count = 5 - _OPTIONAL_FIELDS(receipt_data).count(None)
         
-        required_score = required_count / len(required_fields) * required_weight
-        optional_score = optional_count / len(optional_fields) * optional_weight
-        
-        return required_score + optional_score
+        return _CONFIDENCE_SCORES[required_count][optional_count]
+
+
+# Receipt parser used by the current worker_pool process
+_worker_parser = None
+
+def _init_worker(parser: ReceiptParser) -> None:
+    """Install the receipt parser in a worker_pool process"""
+    global _worker_parser
+    _worker_parser = parser
+
+def parse_in_worker(email_data: Dict) -> Optional[Dict]:
+    """Parse a single email in a worker_pool process, returning None on failure"""
+    return _parse_safely(_worker_parser, email_data)
+
+def _parse_safely(parser: ReceiptParser, email_data: Dict) -> Optional[Dict]:
+    """Parse a single email, returning None on failure"""
+    try:
+        return parser.parse(email_data)
+    except Exception as e:
+        print(f"Error parsing email: {str(e)}")
+        return None
 
 
 class ReceiptParserFactory:
@@ -380,6 +665,11 @@ class ReceiptParserFactory:
     def create_parser() -> ReceiptParser:
         """Create a receipt parser instance"""
         return ReceiptParser()
+    
+    @classmethod
+    def needs_body(cls) -> bool:
+        """Check if created parsers need the email body (not just headers)"""
+        return True
 
 
 if __name__ == "__main__":
@@ -394,17 +684,23 @@ if __name__ == "__main__":
     args = parser.parse_args()
     
     try:
-        with open(args.input, 'r') as f:
-            email_data = json.load(f)
+        with open(args.input, 'rb') as f:
+            data = f.read()
+        email_data = orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
         
         parser = ReceiptParserFactory.create_parser()
         receipt_data = parser.parse(email_data)
         
+        if ORJSON_AVAILABLE:
+            output = orjson.dumps(receipt_data, option=orjson.OPT_INDENT_2, default=str).decode()
+        else:
+            output = json.dumps(receipt_data, indent=2, default=str)
+        
         if args.output:
             with open(args.output, 'w') as f:
-                json.dump(receipt_data, f, indent=2, default=str)
+                f.write(output)
         else:
-            print(json.dumps(receipt_data, indent=2, default=str))
+            print(output)
             
     except Exception as e:
         print(f"Error: {str(e)}")
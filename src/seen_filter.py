@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Seen-Message Filter Module for Email Receipt Scraper
+
+This module provides a persistent Bloom filter of message IDs that were
+already fetched, so incremental runs can skip downloading them again.
+"""
+
+import os
+import math
+import json
+import hashlib
+from typing import Iterable, Optional
+
+DEFAULT_SEEN_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'receipt_scraper', 'seen.bloom')
+
+class SeenFilter:
+    """Bloom filter of fetched message IDs, saved to disk between runs"""
+    
+    def __init__(self, seen_file: str = DEFAULT_SEEN_FILE,
+                 capacity: int = 1000000, error_rate: float = 0.001):
+        """
+        Initialize the seen-message filter
+        
+        Args:
+            seen_file: Path to the file the filter is saved to
+            capacity: Number of message IDs the filter is sized for
+            error_rate: False positive rate at capacity; a false positive
+                makes a new message look already fetched
+        """
+        self.seen_file = seen_file
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        
+        # internalDate (milliseconds since the epoch) of the newest message seen
+        self.last_seen = None
+    
+    def load(self) -> bool:
+        """
+        Load the filter from disk, keeping it empty if there is no usable file
+        
+        Returns:
+            bool: True if a saved filter was loaded, False otherwise
+        """
+        if not os.path.exists(self.seen_file):
+            return False
+        
+        try:
+            with open(self.seen_file, 'rb') as f:
+                header = json.loads(f.readline())
+                bits = f.read()
+            
+            # A filter saved with another size cannot be reused
+            if (header['num_bits'] != self.num_bits or header['num_hashes'] != self.num_hashes
+                    or len(bits) != len(self.bits)):
+                print(f"Ignoring seen filter '{self.seen_file}' saved with other settings.")
+                return False
+            
+            self.bits = bytearray(bits)
+            self.last_seen = header.get('last_seen')
+            return True
+        except Exception as e:
+            print(f"Error loading seen filter: {str(e)}")
+            return False
+    
+    def save(self) -> bool:
+        """
+        Save the filter to disk
+        
+        Returns:
+            bool: True if the filter was saved successfully, False otherwise
+        """
+        try:
+            seen_dir = os.path.dirname(self.seen_file)
+            if seen_dir:
+                os.makedirs(seen_dir, exist_ok=True)
+            
+            # Write to a temporary file first so a crash cannot truncate the filter
+            header = {'num_bits': self.num_bits, 'num_hashes': self.num_hashes,
+                      'last_seen': self.last_seen}
+            temp_file = self.seen_file + '.tmp'
+            with open(temp_file, 'wb') as f:
+                f.write(json.dumps(header).encode() + b'\n')
+                f.write(self.bits)
+            os.replace(temp_file, self.seen_file)
+            return True
+        except Exception as e:
+            print(f"Error saving seen filter: {str(e)}")
+            return False
+    
+    def add(self, message_id: str, internal_date: Optional[int] = None) -> None:
+        """
+        Mark a message as fetched
+        
+        Args:
+            message_id: Message ID
+            internal_date: The message's internalDate, if known
+        """
+        for position in self._positions(message_id):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        
+        if internal_date and (self.last_seen is None or internal_date > self.last_seen):
+            self.last_seen = internal_date
+    
+    def update(self, message_ids: Iterable[str]) -> None:
+        """Mark several messages as fetched"""
+        for message_id in message_ids:
+            self.add(message_id)
+    
+    def __contains__(self, message_id: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(message_id))
+    
+    def _positions(self, message_id: str) -> Iterable[int]:
+        """Bit positions for a message ID, by double hashing one digest"""
+        digest = hashlib.blake2b(message_id.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.num_bits for i in range(self.num_hashes))
@@ -8,9 +8,15 @@ allowing the application to store parsed receipt data in a spreadsheet.
 
 import os
 import json
-import pickle
+import time
+import logging
+import random
+import socket
+import asyncio
+from operator import itemgetter
+from urllib.parse import quote
 from typing import Dict, List, Optional, Any, Union
-from datetime import datetime
+from datetime import datetime, timezone
 
 # Google Sheets API imports
 try:
@@ -19,16 +25,167 @@ try:
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
+    import google_auth_httplib2
     SHEETS_API_AVAILABLE = True
 except ImportError:
     SHEETS_API_AVAILABLE = False
 
+# Async HTTP imports
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SHEETS_API_URL = 'https://sheets.googleapis.com/v4/spreadsheets'
+
+# Append requests in flight at once in append_values_async
+SHEETS_APPEND_CONCURRENCY = 4
+
+# Authenticated (credentials, service) pairs, keyed by credentials file, token
+# file, scopes and connection pool, so integrations set up again in the same
+# process skip reading the token and building the service
+_SERVICE_CACHE = {}
+
+# Refresh access tokens that expire within this many seconds, so the refresh
+# happens while authenticating rather than in the middle of a batch of writes
+TOKEN_REFRESH_MARGIN = 300
+
+def _expires_soon(creds) -> bool:
+    """Check if refreshable credentials expire within TOKEN_REFRESH_MARGIN"""
+    if not creds.refresh_token or creds.expiry is None:
+        return False
+    # google-auth keeps expiry as a naive UTC datetime
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds() < TOKEN_REFRESH_MARGIN
+
+# Rate limits and server errors are retried with exponential backoff and
+# jitter, up to SHEETS_MAX_ATTEMPTS tries in all; other errors fail at once
+SHEETS_MAX_ATTEMPTS = 6
+SHEETS_RETRY_STATUSES = (429, 500, 502, 503, 504)
+SHEETS_MAX_BACKOFF = 60
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retrying, honouring a Retry-After header"""
+    if retry_after is not None and retry_after.isdigit():
+        return min(SHEETS_MAX_BACKOFF, int(retry_after))
+    return min(SHEETS_MAX_BACKOFF, 0.5 * 2 ** attempt) + random.uniform(0, 0.5)
+
+def _execute(request) -> Any:
+    """
+    Execute a Sheets API request, retrying transient failures
+    
+    Args:
+        request: The HttpRequest to execute
+        
+    Returns:
+        The response of the request
+    """
+    for attempt in range(SHEETS_MAX_ATTEMPTS):
+        last_attempt = attempt == SHEETS_MAX_ATTEMPTS - 1
+        try:
+            return request.execute()
+        except HttpError as error:
+            if error.resp.status not in SHEETS_RETRY_STATUSES or last_attempt:
+                raise
+            delay = _retry_delay(attempt, error.resp.get('retry-after'))
+        except socket.timeout:
+            if last_attempt:
+                raise
+            delay = _retry_delay(attempt)
+        time.sleep(delay)
+
+def _in_event_loop() -> bool:
+    """Check if the calling thread is running an asyncio event loop"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+# Column headings of the Receipts sheet
+HEADER_ROW = ['Date', 'Vendor', 'Total', 'Subtotal', 'Tax', 'Shipping',
+              'Discount', 'Order Number', 'Currency', 'Email Subject', 'Confidence']
+
+# Bold, centred text on a grey background for the header row
+HEADER_FORMAT = {
+    'backgroundColor': {
+        'red': 0.8,
+        'green': 0.8,
+        'blue': 0.8
+    },
+    'horizontalAlignment': 'CENTER',
+    'textFormat': {
+        'bold': True
+    }
+}
+
+# The Receipts sheet of a new spreadsheet: the header row and its format
+# are sent with the sheet, so the spreadsheet is ready after a single request
+RECEIPTS_SHEET = {
+    'properties': {
+        'sheetId': 0,
+        'title': 'Receipts',
+        'gridProperties': {
+            'frozenRowCount': 1
+        }
+    },
+    'data': [
+        {
+            'startRow': 0,
+            'startColumn': 0,
+            'rowData': [
+                {
+                    'values': [
+                        {
+                            'userEnteredValue': {'stringValue': heading},
+                            'userEnteredFormat': HEADER_FORMAT
+                        }
+                        for heading in HEADER_ROW
+                    ]
+                }
+            ]
+        }
+    ]
+}
+
+# Receipt field shown in each column, with the value used when it is missing
+RECEIPT_COLUMNS = (
+    ('date', ''),
+    ('vendor', ''),
+    ('total', ''),
+    ('subtotal', ''),
+    ('tax', ''),
+    ('shipping', ''),
+    ('discount', ''),
+    ('order_number', ''),
+    ('currency', 'USD'),
+    ('email_subject', ''),
+    ('confidence', 0.0),
+)
+_RECEIPT_FIELDS = itemgetter(*(field for field, _ in RECEIPT_COLUMNS))
+
+def _receipt_row(receipt_data: Dict) -> List[Any]:
+    """Build the spreadsheet row for a receipt, in HEADER_ROW order"""
+    try:
+        # Parsed receipts have every field, so one C-level lookup does
+        return list(_RECEIPT_FIELDS(receipt_data))
+    except KeyError:
+        return [receipt_data.get(field, default) for field, default in RECEIPT_COLUMNS]
+
 class GoogleSheetsIntegration:
     """Google Sheets integration for storing receipt data"""
     
+    # Rows sent per append request, keeping large imports under the API's
+    # request size limit (SHEETS_APPEND_CHUNK_ROWS environment variable)
+    APPEND_CHUNK_ROWS = int(os.environ.get('SHEETS_APPEND_CHUNK_ROWS', 5000))
+    
     def __init__(self, credentials_file: str = 'credentials.json', 
                  token_file: str = 'sheets_token.json',
-                 scopes: List[str] = None):
+                 scopes: List[str] = None,
+                 http: Any = None):
         """
         Initialize Google Sheets integration
         
@@ -36,9 +193,11 @@ class GoogleSheetsIntegration:
             credentials_file: Path to the credentials.json file
             token_file: Path to save/load the token
             scopes: OAuth scopes to request
+            http: Shared httplib2.Http connection pool to send requests on
         """
         self.credentials_file = credentials_file
         self.token_file = token_file
+        self.http = http
         
         # Default scopes if none provided
         if scopes is None:
@@ -49,6 +208,9 @@ class GoogleSheetsIntegration:
         self.creds = None
         self.service = None
         self.authenticated = False
+        
+        # Receipt rows waiting to be appended by flush()
+        self.row_buffer = []
     
     def authenticate(self) -> bool:
         """
@@ -58,24 +220,36 @@ class GoogleSheetsIntegration:
             bool: True if authentication successful, False otherwise
         """
         if not SHEETS_API_AVAILABLE:
-            print("Google Sheets API libraries not available. Install with:")
-            print("pip install --upgrade google-api-python-client google-auth-httplib2 google-auth-oauthlib")
+            logger.error("Google Sheets API libraries not available. Install with: "
+                         "pip install --upgrade google-api-python-client google-auth-httplib2 google-auth-oauthlib")
             return False
+        
+        cache_key = (self.credentials_file, self.token_file, tuple(self.scopes), self.http)
+        cached = _SERVICE_CACHE.get(cache_key)
+        if cached is not None and cached[0].valid and not _expires_soon(cached[0]):
+            self.creds, self.service = cached
+            self.authenticated = True
+            return True
             
         try:
             # Check if we already have valid credentials
             if os.path.exists(self.token_file):
-                with open(self.token_file, 'rb') as token:
-                    self.creds = pickle.load(token)
+                try:
+                    self.creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
+                except ValueError:
+                    # Tokens saved by older versions were pickled; log in again
+                    logger.warning(f"Ignoring unreadable token file '{self.token_file}'.")
+                    self.creds = None
             
             # If no valid credentials available, let the user log in
-            if not self.creds or not self.creds.valid:
-                if self.creds and self.creds.expired and self.creds.refresh_token:
+            expiring = self.creds is not None and _expires_soon(self.creds)
+            if not self.creds or not self.creds.valid or expiring:
+                if self.creds and self.creds.refresh_token and (self.creds.expired or expiring):
                     self.creds.refresh(Request())
                 else:
                     if not os.path.exists(self.credentials_file):
-                        print(f"Credentials file '{self.credentials_file}' not found.")
-                        print("Please download it from Google Cloud Console.")
+                        logger.error(f"Credentials file '{self.credentials_file}' not found. "
+                                     "Please download it from Google Cloud Console.")
                         return False
                         
                     flow = InstalledAppFlow.from_client_secrets_file(
@@ -83,16 +257,21 @@ class GoogleSheetsIntegration:
                     self.creds = flow.run_local_server(port=0)
                 
                 # Save the credentials for the next run
-                with open(self.token_file, 'wb') as token:
-                    pickle.dump(self.creds, token)
+                with open(self.token_file, 'w') as token:
+                    token.write(self.creds.to_json())
             
-            # Build the Sheets API service
-            self.service = build('sheets', 'v4', credentials=self.creds)
+            # Build the Sheets API service, on the shared connection pool if given
+            if self.http is not None:
+                self.service = build('sheets', 'v4', http=google_auth_httplib2.AuthorizedHttp(
+                    self.creds, http=self.http))
+            else:
+                self.service = build('sheets', 'v4', credentials=self.creds)
+            _SERVICE_CACHE[cache_key] = (self.creds, self.service)
             self.authenticated = True
             return True
             
         except Exception as e:
-            print(f"Authentication failed: {str(e)}")
+            logger.error(f"Authentication failed: {str(e)}")
             return False
     
     def is_authenticated(self) -> bool:
@@ -117,77 +296,18 @@ class GoogleSheetsIntegration:
                 'properties': {
                     'title': title
                 },
-                'sheets': [
-                    {
-                        'properties': {
-                            'title': 'Receipts',
-                            'gridProperties': {
-                                'frozenRowCount': 1
-                            }
-                        }
-                    }
-                ]
+                'sheets': [RECEIPTS_SHEET]
             }
             
-            spreadsheet = self.service.spreadsheets().create(body=spreadsheet).execute()
+            spreadsheet = _execute(self.service.spreadsheets().create(
+                body=spreadsheet, fields='spreadsheetId'))
             spreadsheet_id = spreadsheet.get('spreadsheetId')
             
-            # Set up header row
-            self.update_values(
-                spreadsheet_id,
-                'Receipts!A1:K1',
-                [['Date', 'Vendor', 'Total', 'Subtotal', 'Tax', 'Shipping', 
-                  'Discount', 'Order Number', 'Currency', 'Email Subject', 'Confidence']]
-            )
-            
-            # Format header row
-            format_requests = [
-                {
-                    'repeatCell': {
-                        'range': {
-                            'sheetId': 0,
-                            'startRowIndex': 0,
-                            'endRowIndex': 1
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {
-                                    'red': 0.8,
-                                    'green': 0.8,
-                                    'blue': 0.8
-                                },
-                                'horizontalAlignment': 'CENTER',
-                                'textFormat': {
-                                    'bold': True
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat(backgroundColor,textFormat,horizontalAlignment)'
-                    }
-                },
-                {
-                    'updateSheetProperties': {
-                        'properties': {
-                            'sheetId': 0,
-                            'gridProperties': {
-                                'frozenRowCount': 1
-                            }
-                        },
-                        'fields': 'gridProperties.frozenRowCount'
-                    }
-                }
-            ]
-            
-            self.service.spreadsheets().batchUpdate(
-                spreadsheetId=spreadsheet_id,
-                body={'requests': format_requests}
-            ).execute()
-            
-            print(f"Spreadsheet created: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
+            logger.info(f"Spreadsheet created: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
             return spreadsheet_id
             
         except HttpError as error:
-            print(f"An error occurred: {error}")
+            logger.error(f"An error occurred: {error}")
             return None
     
     def get_spreadsheet_url(self, spreadsheet_id: str) -> str:
@@ -215,23 +335,27 @@ class GoogleSheetsIntegration:
                 'values': values
             }
             
-            result = self.service.spreadsheets().values().update(
+            result = _execute(self.service.spreadsheets().values().update(
                 spreadsheetId=spreadsheet_id,
                 range=range_name,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ))
             
             return True
             
         except HttpError as error:
-            print(f"An error occurred: {error}")
+            logger.error(f"An error occurred: {error}")
             return False
     
     def append_values(self, spreadsheet_id: str, range_name: str, 
                      values: List[List[Any]]) -> bool:
         """
-        Append values to a spreadsheet
+        Append values to a spreadsheet, APPEND_CHUNK_ROWS rows per request
+        
+        With aiohttp installed, several chunks are sent concurrently through
+        append_values_async (unless called from a running event loop), so
+        the chunks may land in the sheet in any order.
         
         Args:
             spreadsheet_id: ID of the spreadsheet
@@ -239,29 +363,139 @@ class GoogleSheetsIntegration:
             values: Values to append
             
         Returns:
-            bool: True if append successful, False otherwise
+            bool: True if append successful, False otherwise; chunks
+                appended before a failure stay in the sheet (flush() keeps
+                the others buffered so only they are retried)
         """
         if not self.is_authenticated():
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
-        try:
+        return not self._append_chunks(spreadsheet_id, range_name, values)
+    
+    def _append_chunks(self, spreadsheet_id: str, range_name: str,
+                       values: List[List[Any]]) -> List[List[Any]]:
+        """
+        Append values chunk by chunk, returning the rows of chunks that failed
+        
+        Any error (HTTP, connection, TLS or token refresh) counts the chunk
+        it hit as unsent, so callers never lose rows to an exception.
+        """
+        chunk_rows = max(1, self.APPEND_CHUNK_ROWS)
+        if len(values) > chunk_rows and AIOHTTP_AVAILABLE and not _in_event_loop():
+            try:
+                return asyncio.run(self.append_values_async(spreadsheet_id, range_name, values))
+            except Exception as error:
+                # Failed before any chunk was sent (e.g. setting up the session)
+                logger.error(f"An error occurred: {error}")
+                return values
+        
+        for start in range(0, len(values), chunk_rows):
             body = {
-                'values': values
+                'values': values[start:start + chunk_rows]
             }
             
-            result = self.service.spreadsheets().values().append(
-                spreadsheetId=spreadsheet_id,
-                range=range_name,
-                valueInputOption='USER_ENTERED',
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
-            
-            return True
+            try:
+                result = _execute(self.service.spreadsheets().values().append(
+                    spreadsheetId=spreadsheet_id,
+                    range=range_name,
+                    valueInputOption='USER_ENTERED',
+                    insertDataOption='INSERT_ROWS',
+                    body=body
+                ))
+            except Exception as error:
+                logger.error(f"An error occurred: {error}")
+                return values[start:]
+        
+        return []
+    
+    async def append_values_async(self, spreadsheet_id: str, range_name: str,
+                                  values: List[List[Any]],
+                                  concurrency: int = SHEETS_APPEND_CONCURRENCY,
+                                  session: 'aiohttp.ClientSession' = None) -> List[List[Any]]:
+        """
+        Append values over aiohttp, with APPEND_CHUNK_ROWS-row chunks sent concurrently
+        
+        Chunks may land in the sheet in any order; rows within a chunk keep
+        their order.
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            range_name: Range to append to (e.g., 'Sheet1!A:B')
+            values: Values to append
+            concurrency: Maximum number of append requests in flight
+            session: aiohttp session to issue requests on (one is created if None)
             
-        except HttpError as error:
-            print(f"An error occurred: {error}")
-            return False
+        Returns:
+            Rows of the chunks that could not be appended, in their original
+            order (empty if every chunk was appended)
+        """
+        if not AIOHTTP_AVAILABLE:
+            raise RuntimeError("aiohttp not available. Install with: pip install aiohttp")
+        
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        own_session = session is None
+        if own_session:
+            session = aiohttp.ClientSession()
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        url = f'{SHEETS_API_URL}/{spreadsheet_id}/values/{quote(range_name, safe="")}:append'
+        
+        async def append_chunk(rows):
+            async with semaphore:
+                try:
+                    await self._append_chunk_async(session, url, rows)
+                    return []
+                except Exception as error:
+                    logger.error(f"An error occurred: {error}")
+                    return rows
+        
+        chunk_rows = max(1, self.APPEND_CHUNK_ROWS)
+        tasks = [asyncio.ensure_future(append_chunk(values[start:start + chunk_rows]))
+                 for start in range(0, len(values), chunk_rows)]
+        try:
+            unsent = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if own_session:
+                await session.close()
+        
+        return [row for rows in unsent for row in rows]
+    
+    async def _append_chunk_async(self, session: 'aiohttp.ClientSession', url: str,
+                                  rows: List[List[Any]]) -> None:
+        """Send one append request, retrying transient failures like _execute"""
+        params = {'valueInputOption': 'USER_ENTERED', 'insertDataOption': 'INSERT_ROWS'}
+        
+        for attempt in range(SHEETS_MAX_ATTEMPTS):
+            last_attempt = attempt == SHEETS_MAX_ATTEMPTS - 1
+            headers = {'Authorization': f'Bearer {self.get_access_token()}'}
+            try:
+                async with session.post(url, params=params, json={'values': rows},
+                                        headers=headers) as response:
+                    if response.status not in SHEETS_RETRY_STATUSES or last_attempt:
+                        response.raise_for_status()
+                        return
+                    delay = _retry_delay(attempt, response.headers.get('Retry-After'))
+            except asyncio.TimeoutError:
+                if last_attempt:
+                    raise
+                delay = _retry_delay(attempt)
+            await asyncio.sleep(delay)
+    
+    def get_access_token(self) -> str:
+        """Get a valid OAuth access token, refreshing it if it has expired"""
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        if not self.creds.valid:
+            self.creds.refresh(Request())
+        
+        return self.creds.token
     
     def get_values(self, spreadsheet_id: str, range_name: str) -> List[List[Any]]:
         """
@@ -278,95 +512,133 @@ class GoogleSheetsIntegration:
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
         try:
-            result = self.service.spreadsheets().values().get(
+            result = _execute(self.service.spreadsheets().values().get(
                 spreadsheetId=spreadsheet_id,
                 range=range_name
-            ).execute()
+            ))
             
             return result.get('values', [])
             
         except HttpError as error:
-            print(f"An error occurred: {error}")
+            logger.error(f"An error occurred: {error}")
+            return []
+    
+    def get_values_batch(self, spreadsheet_id: str,
+                         range_names: List[str]) -> List[List[List[Any]]]:
+        """
+        Get values from several ranges of a spreadsheet in one request
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            range_names: Ranges to get (e.g., ['Sheet1!A1:B2', 'Sheet1!D:D'])
+            
+        Returns:
+            List of rows with values for each range, in the order of range_names
+        """
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        try:
+            result = _execute(self.service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=range_names
+            ))
+            
+            return [value_range.get('values', [])
+                    for value_range in result.get('valueRanges', [])]
+            
+        except HttpError as error:
+            logger.error(f"An error occurred: {error}")
             return []
     
-    def add_receipt_to_spreadsheet(self, spreadsheet_id: str, receipt_data: Dict) -> bool:
+    def add_receipt_to_spreadsheet(self, spreadsheet_id: str, receipt_data: Dict,
+                                   flush: bool = True) -> bool:
         """
         Add receipt data to a spreadsheet
         
         Args:
             spreadsheet_id: ID of the spreadsheet
             receipt_data: Receipt data dictionary
+            flush: Append the row right away; when adding receipts in a loop,
+                pass False and call flush() once at the end to send all the
+                rows in a single request
             
         Returns:
-            bool: True if add successful, False otherwise
+            bool: True if add successful (or the row was buffered), False otherwise
         """
         if not self.is_authenticated():
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
         try:
-            # Prepare row data
-            row = [
-                receipt_data.get('date', ''),
-                receipt_data.get('vendor', ''),
-                receipt_data.get('total', ''),
-                receipt_data.get('subtotal', ''),
-                receipt_data.get('tax', ''),
-                receipt_data.get('shipping', ''),
-                receipt_data.get('discount', ''),
-                receipt_data.get('order_number', ''),
-                receipt_data.get('currency', 'USD'),
-                receipt_data.get('email_subject', ''),
-                receipt_data.get('confidence', 0.0)
-            ]
+            self.row_buffer.append(_receipt_row(receipt_data))
+            if not flush:
+                return True
             
             # Append row to spreadsheet
-            return self.append_values(spreadsheet_id, 'Receipts!A:K', [row])
+            return self.flush(spreadsheet_id)
             
         except Exception as e:
-            print(f"Error adding receipt to spreadsheet: {str(e)}")
+            logger.error(f"Error adding receipt to spreadsheet: {str(e)}")
             return False
     
     def add_multiple_receipts(self, spreadsheet_id: str, 
-                             receipt_data_list: List[Dict]) -> bool:
+                             receipt_data_list: List[Dict],
+                             flush: bool = True) -> bool:
         """
         Add multiple receipt data entries to a spreadsheet
         
         Args:
             spreadsheet_id: ID of the spreadsheet
             receipt_data_list: List of receipt data dictionaries
+            flush: Append the rows right away; pass False to only buffer
+                them until the next flush()
             
         Returns:
-            bool: True if add successful, False otherwise
+            bool: True if add successful (or the rows were buffered), False otherwise
         """
         if not self.is_authenticated():
             raise RuntimeError("Not authenticated. Call authenticate() first.")
         
         try:
             # Prepare rows data
-            rows = []
+            rows = [_receipt_row(receipt_data) for receipt_data in receipt_data_list]
             
-            for receipt_data in receipt_data_list:
-                row = [
-                    receipt_data.get('date', ''),
-                    receipt_data.get('vendor', ''),
-                    receipt_data.get('total', ''),
-                    receipt_data.get('subtotal', ''),
-                    receipt_data.get('tax', ''),
-                    receipt_data.get('shipping', ''),
-                    receipt_data.get('discount', ''),
-                    receipt_data.get('order_number', ''),
-                    receipt_data.get('currency', 'USD'),
-                    receipt_data.get('email_subject', ''),
-                    receipt_data.get('confidence', 0.0)
-                ]
-                rows.append(row)
+            # Append rows to spreadsheet, with any buffered before them
+            self.row_buffer.extend(rows)
+            if not flush:
+                return True
             
-            # Append rows to spreadsheet
-            return self.append_values(spreadsheet_id, 'Receipts!A:K', rows)
+            return self.flush(spreadsheet_id)
             
         except Exception as e:
-            print(f"Error adding receipts to spreadsheet: {str(e)}")
+            logger.error(f"Error adding receipts to spreadsheet: {str(e)}")
             return False
+    
+    def flush(self, spreadsheet_id: str) -> bool:
+        """
+        Append all buffered receipt rows to a spreadsheet
+        
+        Rows that could not be appended stay buffered, ahead of any added
+        later, so calling flush() again retries only those and never adds
+        a row twice.
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            
+        Returns:
+            bool: True if append successful (or nothing was buffered), False otherwise
+        """
+        if not self.row_buffer:
+            return True
+        
+        if not self.is_authenticated():
+            raise RuntimeError("Not authenticated. Call authenticate() first.")
+        
+        rows = self.row_buffer
+        self.row_buffer = []
+        unsent = self._append_chunks(spreadsheet_id, 'Receipts!A:K', rows)
+        self.row_buffer[:0] = unsent
+        return not unsent
 
 
 if __name__ == "__main__":
@@ -387,6 +659,8 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    
     sheets = GoogleSheetsIntegration(credentials_file=args.credentials)
     
     if sheets.authenticate():
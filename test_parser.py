@@ -9,6 +9,13 @@ import json
 import argparse
 from src.receipt_parser import ReceiptParserFactory
 
+# Fast JSON imports
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 def main():
     """Main entry point for the test script"""
     parser = argparse.ArgumentParser(description='Receipt Parser Test')
@@ -30,11 +37,22 @@ def main():
     
     # Process input file or directory
     if os.path.isdir(args.input):
-        # Process all JSON files in directory
-        files = [f for f in os.listdir(args.input) if f.endswith('.json')]
-        for filename in files:
-            input_path = os.path.join(args.input, filename)
-            process_file(input_path, args.output_dir, receipt_parser)
+        # Process all JSON files in directory, parsing them across processes
+        with os.scandir(args.input) as entries:
+            input_paths = [entry.path for entry in entries
+                           if entry.name.endswith('.json') and entry.is_file()]
+        loaded = []
+        for input_path in input_paths:
+            email_data = load_file(input_path)
+            if email_data is not None:
+                loaded.append((input_path, email_data))
+        
+        results = receipt_parser.parse_batch([email_data for _, email_data in loaded])
+        for (input_path, _), receipt_data in zip(loaded, results):
+            if receipt_data is None:
+                print(f"Error processing {input_path}: parsing failed")
+                continue
+            save_result(input_path, args.output_dir, receipt_data)
     else:
         # Process single file
         process_file(args.input, args.output_dir, receipt_parser)
@@ -43,23 +61,46 @@ def main():
 
 def process_file(input_path, output_dir, receipt_parser):
     """Process a single input file"""
+    email_data = load_file(input_path)
+    if email_data is None:
+        return
+    
     try:
-        print(f"Processing {input_path}...")
-        
-        # Load email data
-        with open(input_path, 'r') as f:
-            email_data = json.load(f)
-        
         # Parse receipt data
         receipt_data = receipt_parser.parse(email_data)
+    except Exception as e:
+        print(f"Error processing {input_path}: {str(e)}")
+        return
+    
+    save_result(input_path, output_dir, receipt_data)
+
+def load_file(input_path):
+    """Load the email data of an input file, or None if it cannot be read"""
+    try:
+        print(f"Processing {input_path}...")
         
+        with open(input_path, 'rb') as f:
+            data = f.read()
+        return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+    
+    except Exception as e:
+        print(f"Error processing {input_path}: {str(e)}")
+        return None
+
+def save_result(input_path, output_dir, receipt_data):
+    """Save and summarize the receipt data parsed from an input file"""
+    try:
         # Generate output filename
         base_name = os.path.basename(input_path)
         output_path = os.path.join(output_dir, f"parsed_{base_name}")
         
         # Save parsed data
-        with open(output_path, 'w') as f:
-            json.dump(receipt_data, f, indent=2, default=str)
+        if ORJSON_AVAILABLE:
+            output = orjson.dumps(receipt_data, option=orjson.OPT_INDENT_2, default=str)
+        else:
+            output = json.dumps(receipt_data, indent=2, default=str).encode()
+        with open(output_path, 'wb') as f:
+            f.write(output)
         
         print(f"Parsed receipt data saved to {output_path}")
         print(f"Vendor: {receipt_data.get('vendor')}")